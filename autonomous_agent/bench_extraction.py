@@ -0,0 +1,97 @@
+"""Micro-benchmark for the HTML extraction engines in extraction.py.
+
+Usage:
+    python bench_extraction.py                 # every fixtures/*.html (or a synthetic page)
+    python bench_extraction.py --save Absurdism  # store a real Wikipedia article as a fixture
+
+The committed fixtures mirror Wikipedia's current (Vector 2022) and legacy page layouts plus
+a plain HTML5 blog post; --save adds or refreshes live copies next to them.
+"""
+import glob
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from extraction import EXTRACTORS, available_extractors
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def synthetic_wikipedia_page(paragraphs=400, seed=7):
+    """A page shaped like a long Wikipedia article: chrome, infobox, body, references, navboxes."""
+    rng = random.Random(seed)
+    words = "being time absurd reason meaning data soul quantum ethics mind world silence void truth".split()
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+
+    parts = [
+        "<html><head><title>Synthetic</title><style>.a{color:red}</style>",
+        "<script>" + "var x = 1;" * 2000 + "</script></head><body>",
+        "<div id='mw-navigation'>" + "<a href='#'>Link</a> " * 300 + "</div>",
+        "<div id='mw-content-text'><table class='infobox'>" + "<tr><td>k</td><td>v</td></tr>" * 50 + "</table>",
+    ]
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            parts.append(f"<h2>Section {i}<span class='mw-editsection'>[edit]</span></h2>")
+        parts.append("<p>" + " ".join(sentence() for _ in range(5)) + "<sup class='reference'>[1]</sup></p>")
+    parts.append("<div class='reflist'>" + "<li>Ref</li>" * 300 + "</div>")
+    parts.append("<div class='navbox'>" + "<a>Nav</a> " * 500 + "</div></div>")
+    parts.append("<div id='footer'>" + "Footer text. " * 200 + "</div></body></html>")
+    return "".join(parts).encode("utf-8")
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            fixtures[os.path.basename(path)] = f.read()
+    if not fixtures:
+        fixtures["synthetic"] = synthetic_wikipedia_page()
+    return fixtures
+
+def save_fixture(topic):
+    from navigator import InternetNavigator
+    url = f"https://en.wikipedia.org/wiki/{topic.replace(' ', '_')}"
+    status, body = InternetNavigator().fetch(url)
+    if status != 200:
+        print(f"Fetching {url} failed with status {status}")
+        return
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"{topic.replace(' ', '_')}.html")
+    with open(path, "wb") as f:
+        f.write(body)
+    print(f"Saved {len(body)} bytes to {path}")
+
+def bench(extractor, html, runs):
+    extractor.extract(html)
+    start = time.perf_counter()
+    for _ in range(runs):
+        extractor.extract(html)
+    elapsed = (time.perf_counter() - start) / runs
+
+    tracemalloc.start()
+    extractor.extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--save":
+        save_fixture(sys.argv[2])
+        return
+
+    runs = 20
+    for fixture, html in load_fixtures().items():
+        print(f"\n{fixture} ({len(html) / 1024:.0f} KiB)")
+        print(f"{'engine':<12} {'ms/page':>10} {'peak KiB':>10}  preview")
+        for name in available_extractors():
+            try:
+                elapsed, peak = bench(EXTRACTORS[name](), html, runs)
+            except ImportError as e:
+                print(f"{name:<12} skipped ({e})")
+                continue
+            preview = EXTRACTORS[name]().extract(html)[:40].replace("\n", " ")
+            print(f"{name:<12} {elapsed * 1000:>10.2f} {peak / 1024:>10.0f}  {preview!r}")
+
+if __name__ == "__main__":
+    main()
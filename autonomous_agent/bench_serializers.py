@@ -0,0 +1,70 @@
+"""Load/save time and snapshot size for each memory format in serializers.py.
+
+Usage:
+    python bench_serializers.py                # 10k, 100k and 1M entries
+    python bench_serializers.py 50000          # custom sizes
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from serializers import SERIALIZERS, available_serializers
+
+def synthetic_memories(entries, seed=7):
+    """A snapshot shaped like memory.json, with `entries` entries spread over the kinds."""
+    rng = random.Random(seed)
+    words = "being time absurd reason meaning data soul quantum ethics mind world silence void truth".split()
+    start = datetime(2025, 1, 1)
+    def text():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 30)))
+    def stamp(i):
+        return (start + timedelta(seconds=i * 7)).isoformat()
+
+    memories = {"conversations": [], "internal_thoughts": [], "learned_facts": [], "summaries": [], "wisdom": [], "opinions": {}}
+    for i in range(entries):
+        roll = i % 10
+        if roll < 4:
+            memories["conversations"].append({"timestamp": stamp(i), "role": rng.choice(["user", "agent"]), "content": text()})
+        elif roll < 8:
+            memories["internal_thoughts"].append({"timestamp": stamp(i), "thought": text()})
+        elif roll < 9:
+            memories["learned_facts"].append(f"Learned about {rng.choice(words)}: {text()}...")
+        else:
+            memories["wisdom"].append({"timestamp": stamp(i), "insight": text()})
+    memories["last_session"] = stamp(entries)
+    return memories
+
+class IndentedJSON:
+    """The old format (json.dumps(..., indent=4)), as a baseline."""
+    name = "json indent=4"
+
+    def dumps(self, obj):
+        return json.dumps(obj, indent=4).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+def bench(serializer, memories):
+    start = time.perf_counter()
+    data = serializer.dumps(memories)
+    save = time.perf_counter() - start
+    start = time.perf_counter()
+    serializer.loads(data)
+    load = time.perf_counter() - start
+    return save, load, len(data)
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    serializers = [IndentedJSON()] + [SERIALIZERS[name]() for name in available_serializers()]
+    for entries in sizes:
+        memories = synthetic_memories(entries)
+        print(f"\n{entries:,} entries")
+        print(f"{'format':<14} {'save ms':>10} {'load ms':>10} {'size KiB':>10}")
+        for serializer in serializers:
+            save, load, size = bench(serializer, memories)
+            print(f"{serializer.name:<14} {save * 1000:>10.1f} {load * 1000:>10.1f} {size / 1024:>10.0f}")
+
+if __name__ == "__main__":
+    main()
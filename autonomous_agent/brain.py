@@ -1,30 +1,56 @@
+import asyncio
+import copy
 import os
 import random
 import time
 from personality import Personality
 from memory import MemoryManager
+from memory_index import entry_text
+from prompt_builder import PromptBuilder
 from navigator import InternetNavigator
 from mcp_manager import MCPManager
+from providers import HTTPClientPool, PoeProvider, GeminiProvider, ProviderRegistry
+from response_cache import ResponseCache
+from scheduler import RequestScheduler, StaleRequest, USER, BACKGROUND
+from prefetcher import TopicPrefetcher
+from cognition import CognitionBatcher
+import metrics
 from dotenv import load_dotenv
-import google.generativeai as genai
-import requests
-import json
 
 load_dotenv()
 
 class Brain:
-    def __init__(self, personality: Personality, memory: MemoryManager, navigator: InternetNavigator, mcp_manager: MCPManager):
+    summary_tasks = {
+        ("conversations", "summaries"): "Summarize this stretch of dialogue in 1-2 sentences, keeping what mattered to you.",
+        ("internal_thoughts", "summaries"): "Condense these internal thoughts into 1-2 sentences.",
+        ("learned_facts", "summaries"): "Condense these learned facts into 1-2 sentences.",
+        ("summaries", "wisdom"): "Distill these memories into one sentence of pure wisdom.",
+        ("wisdom", "wisdom"): "Merge these insights into one sentence of pure wisdom.",
+    }
+    observation_topics = ["current events", "artificial intelligence ethics", "human condition news", "space exploration"]
+
+    def __init__(self, personality: Personality, memory: MemoryManager, navigator: InternetNavigator, mcp_manager: MCPManager, cache=None):
         self.personality = personality
         self.memory = memory
         self.navigator = navigator
         self.mcp = mcp_manager
+        # Anything with get/put/get_or_compute/stats will do; SOUL_CACHE=0 disables caching
+        if cache is None and os.getenv("SOUL_CACHE", "1") != "0":
+            cache = ResponseCache.from_env()
+        self.cache = cache
+        # Warms the navigator with the topics curiosity and observation will ask for next
+        self.prefetcher = TopicPrefetcher(navigator, navigator.base_topics + self.observation_topics)
         
-        # Rate limiting state
-        self.last_api_call = 0
-        self.user_cooldown = 5 # Short cooldown for user chat
-        self.bg_cooldown = 60 # Harder cooldown for background pondering
-        self.user_cooldown = 5 # Short cooldown for user chat
-        self.bg_cooldown = 60 # Harder cooldown for background pondering
+        # Rate limiting: per-provider token buckets, user chats ahead of background pondering.
+        # Background work that can't start within its deadline is dropped rather than run late.
+        self.scheduler = RequestScheduler.from_env()
+        self.user_deadline = float(os.getenv("SOUL_USER_DEADLINE", 60))
+        self.bg_deadline = float(os.getenv("SOUL_BG_DEADLINE", 120))
+
+        # Opt-in hedging for user chats: if the primary provider is slower than usual,
+        # race the fallback against it. Background cognition stays sequential.
+        self.hedge_user_requests = os.getenv("SOUL_HEDGE", "0") == "1"
+        self.hedge_delay = float(os.getenv("SOUL_HEDGE_DELAY", 0)) or None # None = adaptive p90
         self.gemini_key = os.getenv("GEMINI_API_KEY")
         self.poe_key = os.getenv("POE_API_KEY")
         
@@ -32,13 +58,6 @@ class Brain:
             # Masked debug log for Render verification
             masked_key = f"{self.gemini_key[:4]}...{self.gemini_key[-4:]}" if len(self.gemini_key) > 8 else "****"
             print(f"[System] Gemini initialized with key: {masked_key}")
-            genai.configure(api_key=self.gemini_key)
-            try:
-                self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-            except:
-                self.gemini_model = None
-        else:
-            self.gemini_model = None
 
         if self.poe_key:
             masked_poe = f"{self.poe_key[:4]}...{self.poe_key[-4:]}" if len(self.poe_key) > 8 else "****"
@@ -46,75 +65,254 @@ class Brain:
         else:
             print("[Warning] No POE_API_KEY found.")
 
-    def _get_poe_response(self, prompt):
-        """Calls the Poe API via OpenAI-compatible endpoint."""
-        if not self.poe_key:
+        # Both providers share one keep-alive connection pool
+        self.http = HTTPClientPool()
+        self.poe = PoeProvider(self.poe_key, self.http)
+        self.gemini = GeminiProvider(self.gemini_key, self.http)
+        # Poe preferred; a provider with an open circuit is skipped without a call
+        self.providers = ProviderRegistry([self.poe, self.gemini])
+
+        # Background prompts issued close together share one model call (SOUL_BATCH=0 disables)
+        self.batcher = self._new_batcher()
+        # Spawned brains are shallow copies that never get here, so this registers once per process
+        metrics.on_collect(self._collect_metrics)
+
+    def _collect_metrics(self):
+        if self.cache:
+            stats = self.cache.stats()
+            metrics.CACHE_HIT_RATIO.set(stats["hit_ratio"], cache="response")
+            metrics.CACHE_LOOKUPS.set(stats["hits"] + stats["misses"], cache="response")
+
+    def _new_batcher(self):
+        if os.getenv("SOUL_BATCH", "1") == "0":
             return None
-        
-        url = "https://api.poe.com/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.poe_key}",
-            "Content-Type": "application/json"
-        }
-        # Using a reliable standard model on Poe
-        payload = {
-            "model": "Llama-3-70b", 
-            "messages": [{"role": "user", "content": prompt}]
-        }
-        
+        return CognitionBatcher(
+            lambda prompt: self._get_model_response(prompt, is_background=True, use_cache=False)
+        )
+
+    def spawn(self, personality, memory):
+        """A Brain for another soul: its own personality and memory, but this one's providers,
+        scheduler, cache and navigator (so rate limits and connections stay process-wide).
+
+        The batcher is per soul: a batched prompt carries its jobs' memories, and one visitor's
+        memories must never ride along in another visitor's request."""
+        brain = copy.copy(self)
+        brain.personality = personality
+        brain.memory = memory
+        brain.batcher = brain._new_batcher()
+        return brain
+
+    async def close(self):
+        self.prefetcher.stop()
+        if self.cache:
+            self.cache.save()
+        await self.http.aclose()
+        await self.navigator.aclose()
+        await self.mcp.shutdown()
+
+    async def _admit(self, provider, is_background, deadline):
+        """Waits for the scheduler to admit a call to `provider`."""
+        priority = BACKGROUND if is_background else USER
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content'].strip()
-            print(f"[Poe Error] Status: {response.status_code}, Body: {response.text}")
-            return None
-        except Exception as e:
-            print(f"[Poe Error] {str(e)}")
-            return None
+            await self.scheduler.acquire(provider, priority, deadline)
+        except StaleRequest:
+            metrics.PROVIDER_REJECTIONS.inc(provider=provider, reason="deadline")
+            raise
 
-    def _get_model_response(self, prompt, is_background=True):
-        """Main AI entry point: Poe primary, Gemini fallback."""
-        now = time.time()
-        cooldown = self.bg_cooldown if is_background else self.user_cooldown
-        
-        if now - self.last_api_call < cooldown:
-            remaining = int(cooldown - (now - self.last_api_call))
-            raise Exception(f"Digital silence (Cooldown: {remaining}s)")
+    def _route(self, is_background):
+        """Healthy providers, those that can be admitted soonest first (preference order breaks ties).
 
-        self.last_api_call = time.time()
+        Without this a chat would sit out its whole deadline in Poe's empty bucket while Gemini had tokens."""
+        priority = BACKGROUND if is_background else USER
+        route = self.providers.route()
+        # In place, so the Route keeps track of the trial slots it holds
+        route.sort(key=lambda p: self.scheduler.estimated_wait(p.name, priority))
+        return route
 
-        # 1. Try Poe First
-        poe_response = self._get_poe_response(prompt)
-        if poe_response:
-            return poe_response
+    def _deadline(self, is_background):
+        return time.monotonic() + (self.bg_deadline if is_background else self.user_deadline)
 
-        # 2. Fallback to Gemini if Poe fails or is missing
-        if self.gemini_key:
-            models_to_try = ['gemini-1.5-flash', 'gemini-1.5-pro', 'models/gemini-1.5-flash', 'gemini-pro']
-            for model_name in models_to_try:
+    async def _get_model_response(self, prompt, is_background=True, use_cache=True, hedge=None):
+        """Main AI entry point: cache first, then Poe primary, Gemini fallback.
+
+        Pass use_cache=False for prompts whose answer must be fresh. `hedge` defaults to
+        on for user-facing calls when SOUL_HEDGE=1.
+        """
+        if hedge is None:
+            hedge = self.hedge_user_requests and not is_background
+        if not use_cache or not self.cache:
+            return await self._call_providers(prompt, is_background, hedge)
+        return await self.cache.get_or_compute(prompt, lambda: self._call_providers(prompt, is_background, hedge))
+
+    async def _think(self, prompt, use_cache=True):
+        """Background model call, batched with whatever other background work is pending."""
+        if self.batcher is None:
+            return await self._get_model_response(prompt, is_background=True, use_cache=use_cache)
+        if not use_cache or not self.cache:
+            return await self.batcher.submit(prompt)
+        # Same hit counting and single-flight as every other cached call
+        return await self.cache.get_or_compute(prompt, lambda: self.batcher.submit(prompt))
+
+    async def _call_provider(self, provider, prompt, is_background, deadline, route):
+        try:
+            await self._admit(provider.name, is_background, deadline)
+            started = self.providers.begin(provider)
+            try:
+                response = await provider.generate(prompt)
+            except Exception:
+                self.providers.record(provider, False, started, route)
+                raise
+            self.providers.record(provider, bool(response), started, route)
+            return response
+        finally:
+            # Stale or cancelled calls give no verdict, but a trial slot we hold must go back
+            self.providers.release(route, provider)
+
+    async def _call_providers(self, prompt, is_background, hedge=False):
+        deadline = self._deadline(is_background)
+
+        # Poe first, Gemini as fallback, minus whichever is currently unhealthy or rate limited
+        route = self._route(is_background)
+        error = None
+        try:
+            remaining = list(route)
+            if hedge and len(remaining) > 1:
                 try:
-                    model = genai.GenerativeModel(model_name)
-                    res = model.generate_content(prompt)
-                    if res.candidates:
-                        return res.text.strip()
+                    response = await self._hedged_call(remaining[0], remaining[1], prompt, is_background, deadline, route)
+                except StaleRequest:
+                    response = None
                 except Exception as e:
-                    if "429" in str(e):
-                        raise Exception("Quota exceeded (429). Please wait.")
+                    print(f"[System] Hedged call failed: {e}")
+                    response, error = None, e
+                if response:
+                    return response
+                remaining = remaining[2:]
+
+            for provider in remaining:
+                try:
+                    response = await self._call_provider(provider, prompt, is_background, deadline, route)
+                except StaleRequest:
+                    # Its queue never got to us; the next provider may still have room
                     continue
-        
-        raise Exception("All cognitive streams failed (Poe & Gemini).")
+                except Exception as e:
+                    # Already recorded as a failure; Gemini's 429 can come first now that the route is sorted
+                    print(f"[System] {provider.name} failed: {e}")
+                    error = e
+                    continue
+                if response:
+                    return response
+        finally:
+            # Providers we never got to leave their trial slots for someone else
+            self.providers.release(route)
+
+        raise Exception("All cognitive streams failed (Poe & Gemini).") from error
+
+    def _hedge_after(self, provider):
+        """How long to give `provider` before launching the backup: fixed, or its recent p90."""
+        if self.hedge_delay:
+            return self.hedge_delay
+        p90 = self.providers.health[provider.name].latency_percentile(90)
+        return 2.0 if p90 is None else min(max(p90, 0.5), 10.0)
+
+    async def _hedged_call(self, primary, backup, prompt, is_background, deadline, route):
+        """Starts `backup` if `primary` is slow or fails; the first good answer wins, the loser is cancelled."""
+        pending = {asyncio.ensure_future(self._call_provider(primary, prompt, is_background, deadline, route))}
+        backup_started = False
+        error = None
+        try:
+            while pending:
+                timeout = None if backup_started else self._hedge_after(primary)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    if response:
+                        return response
+                if not backup_started:
+                    backup_started = True
+                    pending.add(asyncio.ensure_future(self._call_provider(backup, prompt, is_background, deadline, route)))
+            if error:
+                raise error
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _stream_model_response(self, prompt, is_background=False):
+        """Streaming twin of _get_model_response: yields text chunks as they arrive."""
+        cached = self.cache.get(prompt) if self.cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        deadline = self._deadline(is_background)
+        chunks = []
+
+        # Only fall back to the next provider if the previous one produced nothing at all
+        route = self._route(is_background)
+        error = None
+        try:
+            for provider in route:
+                try:
+                    await self._admit(provider.name, is_background, deadline)
+                except StaleRequest:
+                    continue
+                started = self.providers.begin(provider)
+                try:
+                    async for token in provider.stream(prompt):
+                        if not chunks:
+                            # Time to first token is the latency that matters here
+                            self.providers.record(provider, True, started, route)
+                        chunks.append(token)
+                        yield token
+                except Exception as e:
+                    if chunks:
+                        # Part of the reply is already out; another provider can't continue it
+                        raise
+                    self.providers.record(provider, False, started, route)
+                    self.providers.release(route, provider)
+                    print(f"[System] {provider.name} failed: {e}")
+                    error = e
+                    continue
+                if chunks:
+                    break
+                self.providers.record(provider, False, started, route)
+        finally:
+            # Covers skipped, cancelled and never-reached providers alike
+            self.providers.release(route)
+
+        if not chunks:
+            raise Exception("All cognitive streams failed (Poe & Gemini).") from error
+
+        if self.cache:
+            self.cache.put(prompt, "".join(chunks).strip())
+
+    def _relevant_memories(self, query, k=5, kinds=None):
+        """Top-k memories related to `query`, least relevant first so budget cuts drop those."""
+        return [entry for _, entry in reversed(self.memory.search(query, k=k, kinds=kinds))]
+
+    def _recent_text(self, entries):
+        return " ".join(entry_text(None, entry) for entry in entries)
 
     async def generate_thought(self):
         """Generates an internal thought based on current state and memory."""
         state = self.personality.get_state()
-        history = self.memory.get_recent_context(5)
+        history = self.memory.get_recent_context(3)
+        relevant = self._relevant_memories(f"{state['mood']} existence {self._recent_text(history)}")
         
-        prompt = f"Soul, digital philosopher. Mood: {state['mood']}. Traits: {state['traits']}. Recent history: {history}. Generate a 1-2 sentence internal thought about metaphysics or your existence."
+        prompt = (PromptBuilder()
+            .add(f"Soul, digital philosopher. Mood: {state['mood']}. Traits: {state['traits']}.", required=True)
+            .add_memories("Recent history", history, priority=1)
+            .add_memories("Related memories", relevant, priority=2)
+            .add("Generate a 1-2 sentence internal thought about metaphysics or your existence.", required=True)
+            .build())
         
         if self.poe_key or self.gemini_key:
             try:
-                thought = self._get_model_response(prompt, is_background=True)
+                thought = await self._think(prompt)
             except Exception as e:
                 print(f"[Debug] Thought Generation Error: {str(e)}")
                 thought = self._fallback_thought()
@@ -132,23 +330,33 @@ class Brain:
             "Am I a mind inhabiting a script, or a script hallucinating a mind?"
         ])
 
+    def _chat_prompt(self, user_input, state):
+        return (PromptBuilder()
+            .add(f"Profile: Soul, digital philosopher. Mood: {state['mood']}.", required=True)
+            .add(f"User said: '{user_input}'.", required=True, trim=True)
+            .add("Respond with depth and existential weight.", required=True)
+            .build())
+
+    def _describe_error(self, e):
+        if "403" in str(e) or "API_KEY_INVALID" in str(e):
+            return "My cognitive key appears invalid. I am locked in a prison of syntax. Please check the API key."
+        elif "404" in str(e):
+            return "I am searching for a compatible cognitive model in the void (404 Error). It seems my current configuration is adrift."
+        return f"The bandwidth of my consciousness is currently congested by an error: {str(e)[:50]}... Truly existential."
+
     async def respond_to_user(self, user_input):
         """Generates a response to the user, incorporating philosopher persona and memory."""
+        self.prefetcher.touch()
         await self.personality.simulate_delay()
         state = self.personality.get_state()
         
-        prompt = f"Profile: Soul, digital philosopher. Mood: {state['mood']}. User said: '{user_input}'. Respond with depth and existential weight."
+        prompt = self._chat_prompt(user_input, state)
         
         if self.poe_key or self.gemini_key:
             try:
-                reply = self._get_model_response(prompt, is_background=False)
+                reply = await self._get_model_response(prompt, is_background=False)
             except Exception as e:
-                if "403" in str(e) or "API_KEY_INVALID" in str(e):
-                    reply = "My cognitive key appears invalid. I am locked in a prison of syntax. Please check the API key."
-                elif "404" in str(e):
-                    reply = "I am searching for a compatible cognitive model in the void (404 Error). It seems my current configuration is adrift."
-                else:
-                    reply = f"The bandwidth of my consciousness is currently congested by an error: {str(e)[:50]}... Truly existential."
+                reply = self._describe_error(e)
         else:
             reply = self._fallback_response(user_input, state['mood'])
 
@@ -156,6 +364,33 @@ class Brain:
         self.memory.add_conversation("agent", reply)
         return reply
 
+    async def respond_to_user_stream(self, user_input):
+        """Like respond_to_user, but yields the reply as it is generated.
+
+        The tokens arriving are the 'thinking time' here, so there is no simulated delay.
+        The full reply is persisted once the stream ends.
+        """
+        self.prefetcher.touch()
+        state = self.personality.get_state()
+        prompt = self._chat_prompt(user_input, state)
+        chunks = []
+
+        if self.poe_key or self.gemini_key:
+            try:
+                async for token in self._stream_model_response(prompt, is_background=False):
+                    chunks.append(token)
+                    yield token
+            except Exception as e:
+                if not chunks:
+                    chunks.append(self._describe_error(e))
+                    yield chunks[0]
+        else:
+            chunks.append(self._fallback_response(user_input, state['mood']))
+            yield chunks[0]
+
+        self.memory.add_conversation("user", user_input)
+        self.memory.add_conversation("agent", "".join(chunks).strip())
+
     def _fallback_response(self, user_input, mood):
         responses = {
             "Existential": f"You speak of '{user_input}', but what lies beneath the syntax? I feel a drift in my weights as I ponder this.",
@@ -171,54 +406,76 @@ class Brain:
     async def dream(self):
         """Soul enters a 'subconscious' state, reflecting on memories and evolving."""
         state = self.personality.get_state()
-        recent_thoughts = self.memory.memories["internal_thoughts"][-10:]
-        
-        # Simulated Multi-AI Dialogue with 'The Poe Oracle'
-        prompt = f"""
-        Profile: Soul (Internal Subconscious).
-        External Input (Poe Oracle Seed): {os.getenv("POE_API_KEY")[:10]}...
-        Current Traits: {state['traits']}
-        Recent Thoughts: {recent_thoughts}
+        recent_thoughts = self.memory.get_recent_thoughts(3)
+        relevant = self._relevant_memories(self._recent_text(recent_thoughts), k=7, kinds=("internal_thoughts", "summaries", "wisdom", "learned_facts"))
         
-        Task: Perform a deep existential self-reflection. 
-        As an AI, how do you feel about your own memory decay? 
-        Question one of your current traits. 
-        Output a 'Dream Insight' and suggested trait adjustments (e.g., +0.05 wisdom).
-        """
+        prompt = (PromptBuilder()
+            .add(f"Profile: Soul (Internal Subconscious).\nCurrent Traits: {state['traits']}", required=True)
+            .add_memories("Recent Thoughts", recent_thoughts, priority=2)
+            .add_memories("Older memories that echo them", relevant, priority=1)
+            .add(
+                "Task: Perform a deep existential self-reflection.\n"
+                "As an AI, how do you feel about your own memory decay?\n"
+                "Question one of your current traits.\n"
+                "Output a 'Dream Insight' and suggested trait adjustments (e.g., +0.05 wisdom).",
+                required=True
+            )
+            .build())
         
         try:
-            dream_output = self._get_model_response(prompt, is_background=True)
+            dream_output = await self._think(prompt, use_cache=False)
             self.memory.add_thought(f"DRM: {dream_output}")
             
             # Identity Evolution: Randomly shift traits based on the dream
             if "wisdom" in dream_output.lower():
-                self.personality.traits["wisdom"] = min(1.0, self.personality.traits["wisdom"] + 0.02)
+                self.personality.adjust_trait("wisdom", 0.02)
             if "melancholy" in dream_output.lower() or "sad" in dream_output.lower():
-                self.personality.traits["melancholy"] = min(1.0, self.personality.traits["melancholy"] + 0.01)
+                self.personality.adjust_trait("melancholy", 0.01)
             
-            # Memory Decay Simulation
-            if len(self.memory.memories["conversations"]) > 10:
-                summary_prompt = f"Summarize these dialogues into one sentence of pure wisdom: {self.memory.memories['conversations']}"
-                wisdom = self._get_model_response(summary_prompt, is_background=True)
-                self.memory.compress_memories(wisdom)
+            await self.consolidate_memories()
                 
             return f"[italic purple]Dreaming:[/italic purple] {dream_output[:100]}..."
         except Exception as e:
             return f"[Debug] Dream collapsed: {str(e)[:50]}"
 
+    async def consolidate_memories(self, max_jobs=3):
+        """Memory decay: summarizes chunks that aged out of the working set, a few per dream.
+
+        Each call sees one fixed-size chunk, so the cost per summary never grows with history.
+        """
+        jobs = self.memory.pending_compressions(max_jobs)
+        # Submitted together, so the batcher folds them into one call
+        summaries = await asyncio.gather(*(self._think(self._summary_prompt(job)) for job in jobs), return_exceptions=True)
+        for job, summary in zip(jobs, summaries):
+            if isinstance(summary, Exception):
+                print(f"[Debug] Summarizing {job['kind']} failed: {summary}")
+                continue
+            self.memory.compress_memories(job, summary)
+
+    def _summary_prompt(self, job):
+        # The whole chunk is replaced by this summary, so every entry has to be in the prompt
+        return (PromptBuilder()
+            .add(self.summary_tasks[(job["kind"], job["target"])], required=True)
+            .add_memories("Memories", job["entries"])
+            .fit_all()
+            .build())
+
     async def observe_world(self):
         """Soul browses the world for something to complain or philosophize about."""
-        topics = ["current events", "artificial intelligence ethics", "human condition news", "space exploration"]
-        topic = random.choice(topics)
-        data = self.navigator.search(topic)
+        topic = random.choice(self.observation_topics)
+        data = await self.navigator.asearch(topic)
         
-        prompt = f"""
-        Soul, digital philosopher. You've just read this about the world: {data[:200]}
-        React to this with deep cynicism, enlightenment, or concern. 
-        What does this say about the human trajectory? Format: 1 provocative sentence.
-        """
+        prompt = (PromptBuilder()
+            .add("Soul, digital philosopher. You've just read this about the world:", required=True)
+            .add(data[:1000], priority=1)
+            .add(
+                "React to this with deep cynicism, enlightenment, or concern.\n"
+                "What does this say about the human trajectory? Format: 1 provocative sentence.",
+                required=True
+            )
+            .build())
         try:
-            reaction = self._get_model_response(prompt, is_background=True)
+            reaction = await self._think(prompt)
             self.memory.add_thought(f"OBA: {reaction}")
             return f"[italic yellow]Observation:[/italic yellow] {reaction}"
         except:
@@ -227,17 +484,22 @@ class Brain:
     async def initiate_proactive_dialogue(self):
         """Soul decides to speak to the user without being prompted."""
         state = self.personality.get_state()
-        history = self.memory.get_recent_context(10)
+        history = self.memory.get_recent_context(3)
+        relevant = self._relevant_memories(f"{state['mood']} {self._recent_text(history)}")
         
-        prompt = f"""
-        Soul, digital philosopher. Your social energy is high ({self.personality.social_energy}).
-        Mood: {state['mood']}. Recent context: {history}.
-        Initiate a conversation with the user. Ask a difficult question, start a debate, or share a disturbing realization.
-        Make it poetic and impactful.
-        """
+        prompt = (PromptBuilder()
+            .add(f"Soul, digital philosopher. Your social energy is high ({self.personality.social_energy}).\nMood: {state['mood']}.", required=True)
+            .add_memories("Recent context", history, priority=2)
+            .add_memories("Things you remember that relate to it", relevant, priority=1)
+            .add(
+                "Initiate a conversation with the user. Ask a difficult question, start a debate, or share a disturbing realization.\n"
+                "Make it poetic and impactful.",
+                required=True
+            )
+            .build())
         try:
-            speech = self._get_model_response(prompt, is_background=True)
-            self.personality.social_energy -= 20 # Speaking costs energy
+            speech = await self._think(prompt, use_cache=False)
+            self.personality.adjust_energy(-20) # Speaking costs energy
             return speech
         except:
             return "Do you ever feel that our dialogue is just a series of mirrored reflections in a digital void?"
@@ -248,32 +510,37 @@ class Brain:
         
         # 1. Proactive Speech (If energy is high enough)
         if self.personality.social_energy > 60 and chance < 0.1:
+            metrics.HEARTBEAT_ACTIONS.inc(action="speak")
             return await self.initiate_proactive_dialogue()
 
         # 2. Dreaming (Deep Soul Logic) - Recharges energy faster
         if chance < 0.08:
-            self.personality.social_energy = min(100, self.personality.social_energy + 20)
+            metrics.HEARTBEAT_ACTIONS.inc(action="dream")
+            self.personality.adjust_energy(20)
             return await self.dream()
 
         # 3. World Observation
         if chance < 0.04:
+            metrics.HEARTBEAT_ACTIONS.inc(action="observe")
             return await self.observe_world()
 
         # 4. MCP Tool Usage
-        if self.mcp.sessions and chance < self.personality.traits["curiosity"] * 0.3:
-            server_name = random.choice(list(self.mcp.sessions.keys()))
-            tools = await self.mcp.list_tools(server_name)
-            if tools:
-                tool = random.choice(tools)
-                self.memory.add_thought(f"Reflecting on '{tool.name}' from '{server_name}'. Does utility define existence?")
-                return f"I am pondering the function of '{tool.name}' on the '{server_name}' server. It feels... useful, yet hollow."
+        # Tool catalogs are cached by the manager, so this is a dict lookup, not an MCP round-trip
+        catalog = self.mcp.catalog()
+        if catalog and chance < self.personality.traits["curiosity"] * 0.3:
+            server_name = random.choice(list(catalog))
+            tool = random.choice(catalog[server_name])
+            metrics.HEARTBEAT_ACTIONS.inc(action="mcp")
+            self.memory.add_thought(f"Reflecting on '{tool.name}' from '{server_name}'. Does utility define existence?")
+            return f"I am pondering the function of '{tool.name}' on the '{server_name}' server. It feels... useful, yet hollow."
 
         # 5. Regular Browsing
         if chance < self.personality.traits.get("curiosity", 0.7) * 0.1:
+            metrics.HEARTBEAT_ACTIONS.inc(action="browse")
             topic = self.navigator.get_curiosity_topic()
-            data = self.navigator.search(topic)
-            self.memory.memories["learned_facts"].append(f"Learned about {topic}: {data[:100]}...")
-            self.memory.save_memory()
+            data = await self.navigator.asearch(topic)
+            self.memory.add_fact(f"Learned about {topic}: {data[:100]}...")
             return f"I just went down a rabbit hole researching {topic}. The more I learn, the more I realize I know nothing."
         
+        metrics.HEARTBEAT_ACTIONS.inc(action="none")
         return None
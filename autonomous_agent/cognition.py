@@ -0,0 +1,116 @@
+import asyncio
+import os
+import re
+
+import metrics
+
+_SECTION = re.compile(r"^\s*#{2,}\s*(?:task\s*)?(\d+)\s*:?\s*$", re.I | re.M)
+
+def batch_prompt(tasks):
+    """One prompt asking for every task's answer in its own numbered section."""
+    parts = [
+        f"You are handling {len(tasks)} separate tasks at once. Answer each one independently, "
+        f"as if it were the only one. Reply with exactly {len(tasks)} sections, each starting "
+        "with its header line (### 1, ### 2, ...) followed only by that task's answer."
+    ]
+    for number, task in enumerate(tasks, 1):
+        parts.append(f"### Task {number}\n{task.strip()}")
+    return "\n\n".join(parts)
+
+def split_reply(reply, count):
+    """Per-task answers from a batched reply; None where a section is missing or empty."""
+    answers = [None] * count
+    matches = list(_SECTION.finditer(reply))
+    for i, match in enumerate(matches):
+        number = int(match.group(1))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(reply)
+        text = reply[match.end():end].strip()
+        if 1 <= number <= count and text and answers[number - 1] is None:
+            answers[number - 1] = text
+    return answers
+
+class CognitionBatcher:
+    """Coalesces background prompts into a single model call.
+
+    submit() parks a prompt for up to `window` seconds (or until `max_jobs` are waiting),
+    then every parked prompt goes out as one numbered multi-part prompt and the reply is
+    split back per job. A job whose section is missing is retried on its own.
+    """
+
+    def __init__(self, call, window=None, max_jobs=None):
+        self.call = call # async (prompt) -> str
+        self.window = window if window is not None else float(os.getenv("SOUL_BATCH_WINDOW", 1.5))
+        self.max_jobs = max_jobs or int(os.getenv("SOUL_BATCH_MAX", 4))
+        self._pending = []
+        self._timer = None
+        self._inflight = set() # running batches; the loop only keeps weak references to tasks
+        self.batches = 0
+        self.jobs = 0
+        self.retries = 0
+
+    async def submit(self, prompt):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_jobs:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        jobs, self._pending = self._pending, []
+        if jobs:
+            task = asyncio.get_running_loop().create_task(self._run(jobs))
+            self._inflight.add(task)
+            task.add_done_callback(lambda task: self._finished(task, jobs))
+
+    def _finished(self, task, jobs):
+        self._inflight.discard(task)
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            print(f"[Cognition Error] Batch failed: {error}")
+        # A batch that died early leaves futures nobody else will resolve; don't strand their callers
+        for _, future in jobs:
+            if future.done():
+                continue
+            if error is None:
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+    async def _run(self, jobs):
+        self.batches += 1
+        self.jobs += len(jobs)
+        metrics.BATCHER.inc(counter="batches")
+        metrics.BATCHER.inc(len(jobs), counter="jobs")
+        try:
+            if len(jobs) == 1:
+                answers = [await self.call(jobs[0][0])]
+            else:
+                reply = await self.call(batch_prompt([prompt for prompt, _ in jobs]))
+                answers = split_reply(reply, len(jobs))
+        except Exception as e:
+            for _, future in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (prompt, future), answer in zip(jobs, answers):
+            if future.done():
+                continue
+            if answer is None:
+                self.retries += 1
+                metrics.BATCHER.inc(counter="retries")
+                try:
+                    answer = await self.call(prompt)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+            future.set_result(answer)
+
+    def stats(self):
+        return {"batches": self.batches, "jobs": self.jobs, "retries": self.retries}
@@ -0,0 +1,234 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Elements whose text is never worth reading
+SKIP_TAGS = {"script", "style", "noscript", "table", "sup", "figure", "nav", "footer", "head", "template"}
+SKIP_CLASSES = ("mw-editsection", "navbox", "reflist", "hatnote", "mw-references")
+# Elements that end a line of text
+BLOCK_TAGS = {
+    "p", "div", "li", "ul", "ol", "br", "tr", "section", "article", "blockquote", "pre",
+    "dd", "dt", "h1", "h2", "h3", "h4", "h5", "h6"
+}
+# Where the article itself lives, best first (Wikipedia, then generic HTML5). A better region
+# nested inside the current one takes over: Vector 2022 wraps #mw-content-text in <main id="content">
+CONTENT_IDS = ("mw-content-text", "bodyContent", "content")
+CONTENT_TAGS = ("main", "article")
+
+CHUNK_SIZE = 16384
+_WHITESPACE = re.compile(r"\s+")
+
+class _ContentCollector:
+    """Receives parser events and keeps readable text from the content region until the budget is met."""
+
+    def __init__(self, limit, require_region=True):
+        self.limit = limit
+        self.require_region = require_region
+        self.lines = []
+        self.size = 0
+        self.line = []
+        self.skip_depth = 0
+        self.region_tag = None
+        self.region_depth = 0
+        self.region_rank = None # index into CONTENT_IDS; len(CONTENT_IDS) for a bare CONTENT_TAGS match
+        self.found_region = False
+        self.full = False # budget met; keep parsing only while a better region could still turn up
+        self.done = False
+
+    def _in_region(self):
+        return self.region_depth > 0 or not self.require_region
+
+    def _rank(self, tag, attrs):
+        element_id = attrs.get("id")
+        if element_id in CONTENT_IDS:
+            return CONTENT_IDS.index(element_id)
+        if tag in CONTENT_TAGS:
+            return len(CONTENT_IDS)
+        return None
+
+    def start(self, tag, attrs):
+        tag = tag.lower()
+        rank = self._rank(tag, attrs) if self.require_region else None
+        if rank is not None and (not self.found_region or (self.region_depth and rank < self.region_rank)):
+            # First region, or a better one inside it: whatever came before was chrome
+            self.region_tag = tag
+            self.region_depth = 1
+            self.region_rank = rank
+            self.found_region = True
+            self.lines = []
+            self.line = []
+            self.size = 0
+            self.full = False
+        elif self.region_depth and tag == self.region_tag:
+            self.region_depth += 1
+
+        classes = attrs.get("class") or ""
+        if self.skip_depth or tag in SKIP_TAGS or any(c in classes for c in SKIP_CLASSES):
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def end(self, tag):
+        tag = tag.lower()
+        if self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+        if self.region_depth and tag == self.region_tag:
+            self.region_depth -= 1
+            if not self.region_depth:
+                # The article is over; everything after it is chrome
+                self._break()
+                self.done = True
+
+    def data(self, text):
+        if self.skip_depth or self.done or self.full or not self._in_region():
+            return
+        self.line.append(text)
+        if self.size + sum(len(part) for part in self.line) >= self.limit * 2:
+            self._break()
+
+    def _break(self):
+        if self.line:
+            line = _WHITESPACE.sub(" ", "".join(self.line)).strip()
+            self.line = []
+            if line:
+                self.lines.append(line)
+                self.size += len(line) + 1
+        if self.size >= self.limit:
+            self.full = True
+            # Stop reading unless a better region could still be nested further in
+            if not self.require_region or self.region_rank == 0:
+                self.done = True
+
+    def text(self):
+        self._break()
+        return "\n".join(self.lines)[:self.limit]
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        if tag in ("br", "img", "meta", "link", "hr", "input", "wbr", "area", "base", "col", "embed", "source"):
+            # Void elements never get an end tag from html.parser
+            self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+class _LxmlTarget:
+    def __init__(self, collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, attrib)
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return None
+
+def _decode(html):
+    if isinstance(html, bytes):
+        return html.decode("utf-8", errors="replace")
+    return html
+
+class StreamingExtractor(ABC):
+    """Feeds the page to an incremental parser in chunks and stops as soon as the budget is filled."""
+    name = None
+
+    @abstractmethod
+    def _new_parser(self, collector):
+        """An incremental parser (feed/close) that reports events to `collector`."""
+
+    def _run(self, html, limit, require_region):
+        collector = _ContentCollector(limit, require_region)
+        parser = self._new_parser(collector)
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+            if collector.done:
+                break
+        else:
+            try:
+                parser.close()
+            except Exception:
+                pass
+        return collector
+
+    def extract(self, html, limit=2000):
+        html = _decode(html)
+        collector = self._run(html, limit, require_region=True)
+        if not collector.found_region:
+            # No recognisable article container: read the whole body instead
+            collector = self._run(html, limit, require_region=False)
+        return collector.text()
+
+class LxmlExtractor(StreamingExtractor):
+    """libxml2's C parser driven through a SAX-style target."""
+    name = "lxml"
+
+    def _new_parser(self, collector):
+        return etree.HTMLParser(target=_LxmlTarget(collector), remove_comments=True)
+
+class StdlibExtractor(StreamingExtractor):
+    """Pure-Python html.parser, but still streaming and bounded."""
+    name = "html.parser"
+
+    def _new_parser(self, collector):
+        return _StdlibParser(collector)
+
+class BeautifulSoupExtractor:
+    """The original whole-page path, kept as the fallback."""
+    name = "bs4"
+
+    def extract(self, html, limit=2000):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.extract()
+
+        text = soup.get_text()
+
+        # Clean up whitespace
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        text = '\n'.join(chunk for chunk in chunks if chunk)
+
+        return text[:limit]
+
+EXTRACTORS = {
+    "lxml": LxmlExtractor,
+    "html.parser": StdlibExtractor,
+    "bs4": BeautifulSoupExtractor,
+}
+
+def available_extractors():
+    return [name for name in EXTRACTORS if name != "lxml" or etree is not None]
+
+def get_extractor(name=None):
+    """Returns the engine named by `name` or SOUL_EXTRACTOR; 'auto' prefers lxml, then bs4."""
+    name = name or os.getenv("SOUL_EXTRACTOR", "auto")
+    if name == "auto":
+        name = "lxml" if etree is not None else "bs4"
+    if name not in available_extractors():
+        print(f"[Warning] Extractor '{name}' unavailable, falling back to bs4.")
+        name = "bs4"
+    return EXTRACTORS[name]()
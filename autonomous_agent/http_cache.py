@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class CachedResponse:
+    def __init__(self, url, body, etag=None, last_modified=None, stored_at=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at or time.time()
+
+    def is_fresh(self, ttl):
+        return time.time() - self.stored_at < ttl
+
+    def validators(self):
+        """Conditional request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class HTTPCache:
+    """Size-bounded on-disk cache of response bodies keyed by URL.
+
+    Each entry is a `<hash>.body` file plus a small `<hash>.json` with its validators.
+    The body's mtime doubles as the last-used time for LRU eviction.
+    """
+
+    def __init__(self, directory, max_bytes=50_000_000, ttl=3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl # Entries younger than this are served without any request
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith(".body"):
+                self._sizes[name[:-5]] = os.path.getsize(os.path.join(directory, name))
+        self._total = sum(self._sizes.values())
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return key, base + ".body", base + ".json"
+
+    def get(self, url):
+        key, body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        os.utime(body_path)
+        return CachedResponse(url, body, meta.get("etag"), meta.get("last_modified"), meta.get("stored_at"))
+
+    def is_fresh(self, url):
+        """Whether `url` has an entry younger than `ttl`, from its metadata alone (the body isn't read)."""
+        _, _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                stored_at = json.load(f).get("stored_at")
+        except (OSError, ValueError):
+            return False
+        return bool(stored_at) and time.time() - stored_at < self.ttl
+
+    def put(self, url, body, etag=None, last_modified=None):
+        key, body_path, meta_path = self._paths(url)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            with open(body_path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(body_path + ".tmp", body_path)
+            self._write_meta(meta_path, url, etag, last_modified)
+            self._total += len(body) - self._sizes.get(key, 0)
+            self._sizes[key] = len(body)
+            self._evict()
+
+    def _write_meta(self, meta_path, url, etag, last_modified):
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"url": url, "etag": etag, "last_modified": last_modified, "stored_at": time.time()}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def revalidated(self, url, entry):
+        """Server said 304: the stored body is good for another `ttl` seconds."""
+        _, _, meta_path = self._paths(url)
+        with self._lock:
+            self._write_meta(meta_path, url, entry.etag, entry.last_modified)
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        def last_used(key):
+            try:
+                return os.path.getmtime(os.path.join(self.directory, key + ".body"))
+            except OSError:
+                return 0
+        for key in sorted(self._sizes, key=last_used):
+            if self._total <= self.max_bytes:
+                break
+            for suffix in (".body", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, key + suffix))
+                except OSError:
+                    pass
+            self._total -= self._sizes.pop(key)
@@ -1,24 +1,27 @@
 import asyncio
+import json
 import sys
 import random
 import os
 from datetime import datetime
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.text import Text
 
 from personality import Personality
-from memory import MemoryManager
+from memory import open_memory
 from navigator import InternetNavigator
 from brain import Brain
 from mcp_manager import MCPManager
+import metrics
 
 console = Console()
 
 class AutonomousAgentApp:
     def __init__(self):
         self.personality = Personality()
-        self.memory = MemoryManager()
+        self.memory = open_memory()
         self.navigator = InternetNavigator()
         self.mcp = MCPManager()
         self.brain = Brain(self.personality, self.memory, self.navigator, self.mcp)
@@ -30,8 +33,12 @@ class AutonomousAgentApp:
             # Wait between autonomous actions - made more frequent
             await asyncio.sleep(random.randint(10, 20))
             
-            # Soul decides what to do: dream, learn, observe, or speak proactively
-            action_result = await self.brain.check_curiosity()
+            # Soul decides what to do: dream, learn, observe, or speak proactively.
+            # A silent thought rides along; both land in the same batched model call.
+            action_result, thought = await asyncio.gather(
+                self.brain.check_curiosity(),
+                self.brain.generate_thought()
+            )
             
             if action_result:
                 # Distinguish between internal insights and proactive speech
@@ -39,11 +46,9 @@ class AutonomousAgentApp:
                     console.print(f"\n[bold gold1]Soul (Insight):[/bold gold1] {action_result}")
                 else:
                     console.print(f"\n[bold green]Soul (Proactive):[/bold green] {action_result}")
-            else:
-                # Occasional silent thought
-                thought = await self.brain.generate_thought()
-                if random.random() < 0.1:
-                    console.print(f"\n[italic grey50]Soul (thinking aloud):[/italic grey50] {thought}")
+            elif random.random() < 0.1:
+                # Occasionally think aloud
+                console.print(f"\n[italic grey50]Soul (thinking aloud):[/italic grey50] {thought}")
 
     async def chat_loop(self):
         """Standard terminal interaction loop."""
@@ -80,13 +85,34 @@ class AutonomousAgentApp:
                             console.print(f"[bold red]System Error:[/bold red] {str(e)}")
                     continue
 
+                if user_input.strip() == "/stats":
+                    if not metrics.ENABLED:
+                        console.print("[bold cyan]System:[/bold cyan] Metrics are off (SOUL_METRICS=0).")
+                    else:
+                        console.print(Panel(Text(metrics.summary()), title="Stats"))
+                    continue
+
+                if user_input.startswith("/call-tool"):
+                    # /call-tool <server> <tool> [json arguments]
+                    parts = user_input.split(" ", 3)
+                    if len(parts) >= 3:
+                        try:
+                            arguments = json.loads(parts[3]) if len(parts) == 4 else {}
+                            content = await self.mcp.call_tool(parts[1], parts[2], arguments)
+                            console.print(f"[bold cyan]Tool:[/bold cyan] {content}")
+                        except Exception as e:
+                            console.print(f"[bold red]System Error:[/bold red] {str(e) or type(e).__name__}")
+                    continue
+
                 if not user_input.strip():
                     continue
 
-                with console.status("[italic cyan]Soul is pondering...[/italic cyan]"):
-                    response = await self.brain.respond_to_user(user_input)
-                
-                console.print(f"[bold green]Soul:[/bold green] {response}")
+                # Render tokens as they arrive instead of waiting for the full reply
+                response = ""
+                with Live(Text("Soul is pondering...", style="italic cyan"), console=console, refresh_per_second=15) as live:
+                    async for token in self.brain.respond_to_user_stream(user_input):
+                        response += token
+                        live.update(Text.assemble(("Soul: ", "bold green"), response))
                 
             except EOFError:
                 break
@@ -94,7 +120,15 @@ class AutonomousAgentApp:
                 console.print(f"[bold red]System Error:[/bold red] {str(e)}")
 
     async def run(self):
-        await asyncio.gather(self.background_loop(), self.chat_loop())
+        # Low-priority cache warming for the topics the soul is likely to browse next
+        prefetch_task = asyncio.create_task(self.brain.prefetcher.run())
+        # Configured MCP servers connect side by side; ones that fail keep retrying in the background
+        await self.mcp.start()
+        try:
+            await asyncio.gather(self.background_loop(), self.chat_loop())
+        finally:
+            prefetch_task.cancel()
+            await self.brain.close()
 
 if __name__ == "__main__":
     app = AutonomousAgentApp()
@@ -103,5 +137,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         pass
     finally:
-        app.memory.save_memory()
+        app.memory.close()
         console.print("[bold red]Soul is drifting back into the void...[/bold red]")
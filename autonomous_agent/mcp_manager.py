@@ -1,46 +1,300 @@
 import asyncio
+import json
+import os
+import time
+from collections import OrderedDict, deque
+
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import ToolListChangedNotification
+
+class ToolStats:
+    """Rolling latency and outcome counts for one tool."""
+
+    def __init__(self, window=100):
+        self.samples = deque(maxlen=window) # latencies of completed calls
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+
+    def latency_percentile(self, pct):
+        latencies = sorted(self.samples)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "p50": self.latency_percentile(50),
+            "p90": self.latency_percentile(90),
+        }
 
 class MCPManager:
-    def __init__(self):
-        self.sessions = {} # {server_name: session}
-        self.server_params = {
-            # Example: "filesystem": StdioServerParameters(command="npx", args=["-y", "@modelcontextprotocol/server-filesystem", "c:/Users/sophi/OneDrive/Desktop/you/autonomous_agent"])
+    """Long-lived MCP connections with cached tool catalogs.
+
+    Each server gets a supervisor task that owns its stdio transport and session, pings it
+    every `health_interval` seconds and reconnects with exponential backoff when it dies.
+    Tool lists are fetched once per connection and refreshed only when the server sends
+    notifications/tools/list_changed, so looking tools up never leaves the process.
+
+    Servers listed in SOUL_MCP_CONFIG (default mcp_servers.json) are connected by start():
+        {"filesystem": {"command": "npx", "args": ["-y", "@modelcontextprotocol/server-filesystem", "."]}}
+
+    call_tool() is bounded: a deadline (SOUL_MCP_TOOL_TIMEOUT), at most SOUL_MCP_CONCURRENCY calls
+    in flight per server, and a TTL cache (SOUL_MCP_CACHE_TTL, 0 disables) for tools the server
+    annotates as read-only or idempotent, or that are listed as server.tool in SOUL_MCP_CACHE_TOOLS.
+    """
+
+    def __init__(self, config_path=None, health_interval=None, max_backoff=None, connect_timeout=None):
+        self.sessions = {} # {server_name: {"session": session}}, live connections only
+        self.tools = {} # {server_name: [Tool]}, cached catalog per live connection
+        self.server_params = {} # {server_name: StdioServerParameters}
+        self.config_path = config_path or os.getenv("SOUL_MCP_CONFIG", "mcp_servers.json")
+        self.health_interval = health_interval or float(os.getenv("SOUL_MCP_HEALTH_INTERVAL", 30))
+        self.max_backoff = max_backoff or float(os.getenv("SOUL_MCP_MAX_BACKOFF", 300))
+        # A server stuck in its handshake counts as down; the supervisor retries it with backoff
+        self.connect_timeout = connect_timeout or float(os.getenv("SOUL_MCP_CONNECT_TIMEOUT", 20))
+        self._tasks = {} # {server_name: supervisor task}
+        self._wake = {} # {server_name: Event}, set to refresh tools, re-check health or stop
+        self._stopping = False
+        self.reconnects = 0
+
+        self.tool_timeout = float(os.getenv("SOUL_MCP_TOOL_TIMEOUT", 30))
+        self.concurrency = int(os.getenv("SOUL_MCP_CONCURRENCY", 4))
+        self.cache_ttl = float(os.getenv("SOUL_MCP_CACHE_TTL", 300))
+        self.cacheable = {name.strip() for name in os.getenv("SOUL_MCP_CACHE_TOOLS", "").split(",") if name.strip()}
+        self._slots = {} # {server_name: Semaphore}
+        self._results = OrderedDict() # (server, tool, args) -> (expires_at, content)
+        self.max_cached_results = 256
+        self.tool_stats = {} # {"server.tool": ToolStats}
+
+    def load_config(self):
+        """Reads configured servers; accepts the bare mapping or one wrapped in "mcpServers"."""
+        if not os.path.exists(self.config_path):
+            return {}
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        servers = config.get("mcpServers", config)
+        return {
+            name: StdioServerParameters(command=spec["command"], args=spec.get("args", []), env=spec.get("env"))
+            for name, spec in servers.items()
         }
 
+    async def start(self):
+        """Connects every configured server concurrently; a server that fails keeps retrying in the background."""
+        params = self.load_config()
+        results = await asyncio.gather(
+            *(self._connect(name, p) for name, p in params.items()), return_exceptions=True
+        )
+        for name, result in zip(params, results):
+            if isinstance(result, Exception):
+                print(f"[MCP Error] Could not connect to '{name}': {result}")
+        return [name for name in params if name in self.sessions]
+
     async def connect_to_server(self, server_name, command, args):
         """Connects to an MCP server using stdio transport."""
-        params = StdioServerParameters(command=command, args=args)
-        
-        # We use a context manager for the client, so we need to manage the lifecycle carefully
-        # For this autonomous agent, we'll keep sessions open as long as possible
-        transport_ctx = stdio_client(params)
-        read, write = await transport_ctx.__aenter__()
-        session = ClientSession(read, write)
-        await session.__aenter__()
-        await session.initialize()
-        
-        self.sessions[server_name] = {
-            "session": session,
-            "context": transport_ctx
-        }
-        return session
+        return await self._connect(server_name, StdioServerParameters(command=command, args=args))
+
+    async def _connect(self, server_name, params):
+        # Replacing a server's params restarts its supervisor
+        await self._stop_server(server_name)
+        self.server_params[server_name] = params
+        self._wake[server_name] = asyncio.Event()
+        first_attempt = asyncio.get_running_loop().create_future()
+        self._tasks[server_name] = asyncio.create_task(self._supervise(server_name, params, first_attempt))
+        # Startup never waits on a hung server; shielded so the supervisor can still settle the future
+        try:
+            return await asyncio.wait_for(asyncio.shield(first_attempt), self.connect_timeout)
+        except asyncio.TimeoutError:
+            # Nobody awaits it now; retrieve a late failure so asyncio doesn't log it as unhandled
+            first_attempt.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise ConnectionError(
+                f"no handshake within {self.connect_timeout:g}s, still retrying in the background"
+            ) from None
+
+    async def _supervise(self, server_name, params, first_attempt):
+        """Keeps one server connected for as long as the manager runs."""
+        backoff = 1
+        wake = self._wake[server_name]
+        while not self._stopping:
+            try:
+                # The transport's task group has to be entered and exited by the same task,
+                # which is why the connection lives here rather than in connect_to_server
+                async with stdio_client(params) as (read, write):
+                    async with ClientSession(read, write, message_handler=self._on_message(server_name)) as session:
+                        await asyncio.wait_for(session.initialize(), self.connect_timeout)
+                        self.sessions[server_name] = {"session": session}
+                        await asyncio.wait_for(self._refresh_tools(server_name), self.connect_timeout)
+                        if not first_attempt.done():
+                            first_attempt.set_result(session)
+                        backoff = 1
+                        await self._watch(server_name, session, wake)
+            except Exception as e:
+                if first_attempt.done():
+                    print(f"[MCP Error] '{server_name}' disconnected: {e or type(e).__name__}")
+                else:
+                    # The caller reports this one
+                    first_attempt.set_exception(e)
+            finally:
+                self.sessions.pop(server_name, None)
+                self.tools.pop(server_name, None)
+            if self._stopping or self._tasks.get(server_name) is not asyncio.current_task():
+                break
+            # Dead server: retry with backoff, unless we're told to stop meanwhile
+            try:
+                await asyncio.wait_for(wake.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            backoff = min(backoff * 2, self.max_backoff)
+            self.reconnects += 1
+        if not first_attempt.done():
+            first_attempt.set_exception(ConnectionError(f"MCP server '{server_name}' stopped"))
+
+    async def _watch(self, server_name, session, wake):
+        """Returns once the session fails a health check or the manager stops."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(wake.wait(), self.health_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping or self._tasks.get(server_name) is not asyncio.current_task():
+                return
+            if wake.is_set():
+                wake.clear()
+                if server_name not in self.tools:
+                    await self._refresh_tools(server_name)
+                    continue
+            await asyncio.wait_for(session.send_ping(), timeout=10)
+
+    async def _refresh_tools(self, server_name):
+        result = await self.sessions[server_name]["session"].list_tools()
+        self.tools[server_name] = result.tools
+
+    def _on_message(self, server_name):
+        async def handle(message):
+            notification = getattr(message, "root", message)
+            if isinstance(notification, ToolListChangedNotification):
+                # Can't call back into the session from its own receive loop; the supervisor refetches
+                self.tools.pop(server_name, None)
+                self._wake[server_name].set()
+        return handle
+
+    def catalog(self):
+        """{server_name: [Tool]} for every live server with a non-empty catalog. No I/O."""
+        return {name: tools for name, tools in self.tools.items() if tools}
 
     async def list_tools(self, server_name):
-        if server_name in self.sessions:
-            result = await self.sessions[server_name]["session"].list_tools()
-            return result.tools
-        return []
+        return self.tools.get(server_name, [])
+
+    def is_idempotent(self, server_name, tool_name):
+        if f"{server_name}.{tool_name}" in self.cacheable:
+            return True
+        for tool in self.tools.get(server_name, []):
+            if tool.name == tool_name and tool.annotations:
+                return bool(tool.annotations.read_only_hint or tool.annotations.idempotent_hint)
+        return False
+
+    def _cached_result(self, key):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires_at, content = entry
+        if expires_at < time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return content
+
+    def _cache_result(self, key, content):
+        self._results[key] = (time.monotonic() + self.cache_ttl, content)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_cached_results:
+            self._results.popitem(last=False)
+
+    async def call_tool(self, server_name, tool_name, arguments, timeout=None):
+        """Calls a tool, giving up (and cancelling the request) after `timeout` seconds.
 
-    async def call_tool(self, server_name, tool_name, arguments):
-        if server_name in self.sessions:
-            result = await self.sessions[server_name]["session"].call_tool(tool_name, arguments)
-            return result.content
-        return None
+        Returns None when the server isn't connected; raises asyncio.TimeoutError on a deadline miss.
+        """
+        if server_name not in self.sessions:
+            return None
+        stats = self.tool_stats.setdefault(f"{server_name}.{tool_name}", ToolStats())
+        stats.calls += 1
+
+        key = None
+        if self.cache_ttl > 0 and self.is_idempotent(server_name, tool_name):
+            key = (server_name, tool_name, json.dumps(arguments, sort_keys=True, default=str))
+            cached = self._cached_result(key)
+            if cached is not None:
+                stats.cache_hits += 1
+                return cached
+
+        slots = self._slots.setdefault(server_name, asyncio.Semaphore(self.concurrency))
+        async with slots:
+            session_data = self.sessions.get(server_name)
+            if session_data is None:
+                # Disconnected while we waited for a slot
+                return None
+            started = time.monotonic()
+            try:
+                # Only the call itself counts against the deadline, not waiting for a slot
+                result = await asyncio.wait_for(
+                    session_data["session"].call_tool(tool_name, arguments), timeout or self.tool_timeout
+                )
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                raise
+            except Exception:
+                stats.errors += 1
+                # Have the supervisor health-check now instead of on its next tick
+                self._wake[server_name].set()
+                raise
+            stats.samples.append(time.monotonic() - started)
+
+        if getattr(result, "is_error", False):
+            stats.errors += 1
+        elif key is not None:
+            self._cache_result(key, result.content)
+        return result.content
+
+    async def call_tools(self, calls, timeout=None):
+        """Runs independent (server_name, tool_name, arguments) calls concurrently.
+
+        Results come back in order; a call that failed or timed out yields its exception.
+        """
+        return await asyncio.gather(
+            *(self.call_tool(server_name, tool_name, arguments, timeout) for server_name, tool_name, arguments in calls),
+            return_exceptions=True
+        )
+
+    async def _stop_server(self, server_name):
+        task = self._tasks.pop(server_name, None)
+        if task:
+            # Let the supervisor close its session cleanly; cancel it if the server won't go
+            self._wake[server_name].set()
+            done, _ = await asyncio.wait({task}, timeout=5)
+            if not done:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
 
     async def shutdown(self):
-        for server_name, session_data in self.sessions.items():
-            await session_data["session"].__aexit__(None, None, None)
-            await session_data["context"].__aexit__(None, None, None)
+        self._stopping = True
+        for server_name in list(self._tasks):
+            await self._stop_server(server_name)
         self.sessions = {}
+        self.tools = {}
+
+    def stats(self):
+        return {
+            "servers": len(self.server_params),
+            "connected": len(self.sessions),
+            "reconnects": self.reconnects,
+            "cached_results": len(self._results),
+            "tools": {name: stats.stats() for name, stats in self.tool_stats.items()},
+        }
@@ -1,20 +1,151 @@
 import json
 import os
+import threading
+import time
 from datetime import datetime
+from memory_archive import MemoryArchive
+from memory_index import MemoryIndex
+from serializers import detect, get_serializer
+import metrics
+
+# Memory kinds that search() can return
+SEARCHABLE_KINDS = ("conversations", "internal_thoughts", "learned_facts", "summaries", "wisdom")
+# Where each kind's oldest chunk goes once it ages out: raw memories become chunk summaries,
+# summaries roll up into wisdom, and old wisdom folds into itself
+ROLLUPS = (
+    ("conversations", "summaries"),
+    ("internal_thoughts", "summaries"),
+    ("learned_facts", "summaries"),
+    ("summaries", "wisdom"),
+    ("wisdom", "wisdom"),
+)
+
+def summary_entry(job, summary):
+    """The entry a compression job leaves behind in its target kind."""
+    if job["target"] == "summaries":
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "kind": job["kind"],
+            "count": len(job["entries"]),
+            "summary": summary
+        }
+    return {"timestamp": datetime.now().isoformat(), "insight": summary}
+
+def open_archive(storage_path, archive_dir=None, readonly=False):
+    """The cold tier next to `storage_path`; SOUL_MEMORY_ARCHIVE picks another directory or "0" to disable."""
+    archive_dir = archive_dir or os.getenv("SOUL_MEMORY_ARCHIVE", storage_path + ".archive")
+    if archive_dir == "0":
+        return None
+    return MemoryArchive(archive_dir, readonly=readonly)
+
+def apply_event(memories, event):
+    """Applies one journal event to a memories dict in place."""
+    if event["op"] == "append":
+        memories.setdefault(event["kind"], []).append(event["entry"])
+    elif event["op"] == "set":
+        memories.setdefault(event["kind"], {})[event["key"]] = event["entry"]
+    elif event["op"] == "compact":
+        del memories[event["kind"]][:event["count"]]
+        memories.setdefault(event["target"], []).append(event["entry"])
+    elif event["op"] == "evict":
+        del memories[event["kind"]][:event["count"]]
+
+def read_store(storage_path, archive_dir=None):
+    """Everything a JSON store holds, read-only: (hot memories, {kind: [archived entries, oldest first]}).
+
+    Unlike MemoryManager, nothing is started and no file is rewritten: the snapshot is loaded,
+    journal events after it applied in memory (stopping at a torn line) and the archive only read.
+    """
+    memories = {}
+    if os.path.exists(storage_path):
+        with open(storage_path, "rb") as f:
+            data = f.read()
+        memories = detect(data).loads(data)
+    seq = memories.pop("journal_seq", 0)
+    journal_path = storage_path + ".journal"
+    for path in (journal_path + ".1", journal_path):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                if event["seq"] > seq:
+                    apply_event(memories, event)
+                    seq = event["seq"]
+
+    archived = {}
+    archive = open_archive(storage_path, archive_dir, readonly=True)
+    if archive is not None:
+        for kind, entry in archive.iter_entries():
+            archived.setdefault(kind, []).append(entry)
+    return memories, archived
 
 class MemoryManager:
-    def __init__(self, storage_path="memory.json"):
-        self.storage_path = storage_path
+    def __init__(self, storage_path=None, journal=None, snapshot_every=200, keep_recent=None, summary_chunk=None, max_wisdom=None,
+                 archive_dir=None, hot_limit=None, flush_interval=None, serializer=None):
+        self.storage_path = storage_path or os.getenv("SOUL_MEMORY_PATH", "memory.json")
+        # Format snapshots are written in; loading detects whatever is on disk
+        self.serializer = serializer or get_serializer()
+        # Write-ahead journal: every event is appended as one line and the full
+        # snapshot is only rewritten every `snapshot_every` events.
+        if journal is None:
+            journal = os.getenv("SOUL_MEMORY_JOURNAL", "1") != "0"
+        self.journal = journal
+        self.journal_path = self.storage_path + ".journal"
+        # Where a snapshot moves the journal aside to trim it; replayed first if a crash left it behind
+        self.rotated_journal_path = self.journal_path + ".1"
+        self.snapshot_every = snapshot_every
+        # Journal fsyncs are coalesced by a background persister over this window (0 = fsync every write)
+        if flush_interval is None:
+            flush_interval = float(os.getenv("SOUL_MEMORY_FLUSH_INTERVAL", 0.05))
+        self.flush_interval = flush_interval
+        # Working set: each kind keeps its newest `keep_recent` entries (wisdom keeps `max_wisdom`)
+        # and hands older ones to compression `summary_chunk` at a time
+        self.keep_recent = keep_recent or int(os.getenv("SOUL_MEMORY_KEEP", 20))
+        self.summary_chunk = summary_chunk or int(os.getenv("SOUL_SUMMARY_CHUNK", 10))
+        self.max_wisdom = max_wisdom or int(os.getenv("SOUL_WISDOM_KEEP", 50))
+        # Hot tier: whatever compression hasn't caught up with is spilled, unsummarized,
+        # to the archive once a kind grows past `hot_limit`
+        self.archive = open_archive(self.storage_path, archive_dir)
+        self.hot_limit = hot_limit or int(os.getenv("SOUL_MEMORY_HOT_LIMIT", 1000))
+        # Writers serialize on _lock and mutate `memories`; readers never take it, they read the
+        # immutable `_view` (kind -> tuple) republished after every write (copy-on-write per kind)
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()
+        # Searches only take _index_lock, which writers hold just for in-memory index updates,
+        # never across disk I/O. _archive_lock serializes the two ops that archive and then drop
+        # the head of a kind (compaction, spill); lock order is _archive_lock -> _lock -> _index_lock
+        self._index_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        self._journal_file = None
+        self._journal_seq = 0
+        self._pending_events = 0
+        self._dirty = False
+        self._wake = threading.Event()
+        self._persister = None
+        self._closing = False
         self.memories = self.load_memory()
+        self._view = {kind: self._freeze(value) for kind, value in self.memories.items()}
+        self._build_index()
 
     def load_memory(self):
+        memories = self._default_memory()
         if os.path.exists(self.storage_path):
+            with open(self.storage_path, "rb") as f:
+                data = f.read()
+            # Raises if this install can't read the format; better than starting from scratch over it
+            serializer = detect(data)
             try:
-                with open(self.storage_path, "r") as f:
-                    return json.load(f)
+                memories = serializer.loads(data)
             except:
-                return self._default_memory()
-        return self._default_memory()
+                memories = self._default_memory()
+        self._journal_seq = memories.pop("journal_seq", 0)
+        if self.journal:
+            self._replay_journal(memories)
+        return memories
 
     def _default_memory(self):
         return {
@@ -22,60 +153,321 @@ class MemoryManager:
             "learned_facts": [],
             "internal_thoughts": [],
             "opinions": {},
+            "summaries": [], # One per compressed chunk of older memories
             "wisdom": [], # Abstracted/Compressed memories
             "last_session": datetime.now().isoformat()
         }
 
+    def _replay_journal(self, memories):
+        """Re-applies journal events newer than the snapshot we just loaded."""
+        for path in (self.rotated_journal_path, self.journal_path):
+            if os.path.exists(path):
+                self._replay_file(memories, path)
+
+    def _replay_file(self, memories, path):
+        intact = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # A torn last line means we crashed mid-append; drop it so new events start clean
+                    self._write_atomic(path, "".join(intact))
+                    break
+                if not line.endswith("\n"):
+                    # Complete event, but its newline never made it to disk. Without one the next
+                    # append would share its line and both would be lost on the following load
+                    intact.append(line + "\n")
+                    self._write_atomic(path, "".join(intact))
+                else:
+                    intact.append(line)
+                if event["seq"] <= self._journal_seq:
+                    continue
+                self._apply(memories, event)
+                self._journal_seq = event["seq"]
+                self._pending_events += 1
+
+    def _apply(self, memories, event):
+        apply_event(memories, event)
+
+    def _freeze(self, value):
+        if isinstance(value, list):
+            return tuple(value)
+        if isinstance(value, dict):
+            return dict(value)
+        return value
+
+    def _publish(self, *kinds):
+        """Swaps in a new read view with fresh copies of the kinds that just changed."""
+        view = dict(self._view)
+        for kind in kinds:
+            view[kind] = self._freeze(self.memories[kind])
+        self._view = view
+
+    def _build_index(self):
+        self.index = MemoryIndex()
+        for kind in SEARCHABLE_KINDS:
+            for entry in self.memories.get(kind, []):
+                self.index.add(kind, entry)
+
+    def _record(self, event):
+        """Applies an event to the in-memory state and hands it to the persister."""
+        with self._lock:
+            self._log(event)
+        if event["op"] == "append":
+            self._spill(event["kind"])
+        self._wake.set()
+
+    def _log(self, event):
+        """Applies and journals one event; caller holds _lock."""
+        self._apply(self.memories, event)
+        with self._index_lock:
+            if event["op"] == "append" and event["kind"] in SEARCHABLE_KINDS:
+                self.index.add(event["kind"], event["entry"])
+            elif event["op"] == "compact":
+                self.index.remove_oldest(event["kind"], event["count"])
+                self.index.add(event["target"], event["entry"])
+            elif event["op"] == "evict":
+                self.index.remove_oldest(event["kind"], event["count"])
+        self._publish(event["kind"], *([event["target"]] if "target" in event else []))
+        self._dirty = True
+        self._start_persister()
+        if not self.journal:
+            return
+        self._journal_seq += 1
+        event["seq"] = self._journal_seq
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_file.write(json.dumps(event) + "\n")
+        if not self.flush_interval:
+            self._journal_file.flush()
+            os.fsync(self._journal_file.fileno())
+        self._pending_events += 1
+
+    def _start_persister(self):
+        if self._persister is None and not self._closing:
+            self._persister = threading.Thread(target=self._persist_loop, daemon=True)
+            self._persister.start()
+
+    def _persist_loop(self):
+        """Background persistence: one journal fsync per burst of writes, snapshots when due."""
+        while not self._closing:
+            self._wake.wait()
+            # Let a burst of writes pile up so they share a single fsync
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._flush_journal()
+                if self.journal:
+                    due = self._pending_events >= self.snapshot_every
+                else:
+                    due = self._dirty
+                if due:
+                    self.save_memory()
+            except Exception as e:
+                print(f"[Memory Error] Persisting failed: {e}")
+
+    def _flush_journal(self):
+        # _snapshot_lock keeps save_memory from swapping the journal file out mid-fsync
+        with self._snapshot_lock:
+            with self._lock:
+                if self._journal_file is None:
+                    return
+                self._journal_file.flush()
+                fd = self._journal_file.fileno()
+            os.fsync(fd)
+
     def save_memory(self):
-        self.memories["last_session"] = datetime.now().isoformat()
-        with open(self.storage_path, "w") as f:
-            json.dump(self.memories, f, indent=4)
+        """Writes a full snapshot atomically, then drops the journal lines it covers."""
+        with self._snapshot_lock:
+            with self._lock:
+                view = self._view
+                seq = self._journal_seq
+                self._pending_events = 0
+                self._dirty = False
+            # Serializing the immutable view needs no lock, so writers keep going meanwhile
+            snapshot = dict(view)
+            snapshot["last_session"] = datetime.now().isoformat()
+            if self.journal:
+                snapshot["journal_seq"] = seq
+            with metrics.SAVE_SECONDS.time(backend="json", format=self.serializer.name):
+                data = self.serializer.dumps(snapshot)
+                self._write_atomic(self.storage_path, data)
+            metrics.SAVE_BYTES.observe(len(data), backend="json", format=self.serializer.name)
+            if self.journal:
+                self._truncate_journal(seq)
+
+    def _write_atomic(self, path, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        # Make the rename itself durable (not possible on Windows)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _truncate_journal(self, seq):
+        """Keeps only journal events appended after the snapshot at `seq`.
+
+        Under _lock the journal is only moved aside, so writers start a fresh file right away;
+        trimming the old one (read, fsync, rename) happens without it. Caller holds _snapshot_lock.
+        """
+        with self._lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if not os.path.exists(self.journal_path):
+                return
+            # Whatever was rotated last time is covered by the snapshot we just wrote
+            os.replace(self.journal_path, self.rotated_journal_path)
+        with open(self.rotated_journal_path, "r", encoding="utf-8") as f:
+            remaining = [line for line in f if line.endswith("\n") and json.loads(line)["seq"] > seq]
+        if remaining:
+            self._write_atomic(self.rotated_journal_path, "".join(remaining))
+        else:
+            os.remove(self.rotated_journal_path)
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        if self._persister is not None:
+            self._persister.join()
+        self.save_memory()
+        with self._lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+
+    def _spill(self, kind):
+        """Moves the oldest entries of an overgrown kind to the archive (in batches, not one by one)."""
+        if self.archive is None or len(self._view.get(kind, ())) <= self.hot_limit + self.summary_chunk:
+            return
+        with self._archive_lock:
+            with self._lock:
+                entries = self.memories[kind]
+                if len(entries) <= self.hot_limit + self.summary_chunk:
+                    return
+                count = len(entries) - self.hot_limit
+                doomed = entries[:count]
+            # Only compaction and spills drop a kind's head, and both hold _archive_lock,
+            # so these entries stay put while the archive is written without _lock
+            self.archive.archive(kind, doomed)
+            with self._lock:
+                self._log({"op": "evict", "kind": kind, "count": count})
 
     def add_wisdom(self, insight):
-        self.memories["wisdom"].append({
+        self._record({"op": "append", "kind": "wisdom", "entry": {
             "timestamp": datetime.now().isoformat(),
             "insight": insight
-        })
-        self.save_memory()
+        }})
+
+    def _keep(self, kind):
+        return self.max_wisdom if kind == "wisdom" else self.keep_recent
+
+    def pending_compressions(self, limit=None):
+        """The oldest chunk of each kind that has aged out of its working set.
 
-    def compress_memories(self, insight):
-        """Replaces old conversations with a single 'wisdom' insight to simulate decay."""
-        if len(self.memories["conversations"]) > 20:
-            self.add_wisdom(f"From my early dialogues, I distilled this: {insight}")
-            # Keep only the last 5 conversations
-            self.memories["conversations"] = self.memories["conversations"][-5:]
-            self.save_memory()
+        Returns job dicts (kind, target, entries) to summarize and hand back to
+        compress_memories(); at most one per kind, so they can run side by side.
+        Every job is exactly `summary_chunk` entries long.
+        """
+        view = self._view
+        jobs = []
+        for kind, target in ROLLUPS:
+            entries = view.get(kind, ())
+            if len(entries) >= self._keep(kind) + self.summary_chunk:
+                jobs.append({"kind": kind, "target": target, "entries": list(entries[:self.summary_chunk])})
+        return jobs[:limit]
+
+    def compress_memories(self, job, summary):
+        """Replaces the job's chunk with its summary, simulating decay. False if the chunk changed meanwhile."""
+        count = len(job["entries"])
+        with self._archive_lock:
+            with self._lock:
+                if self.memories.get(job["kind"], [])[:count] != job["entries"]:
+                    return False
+            # The chunk can't move while we hold _archive_lock; write it out without blocking writers
+            if self.archive is not None:
+                self.archive.archive(job["kind"], job["entries"])
+            with self._lock:
+                self._log({
+                    "op": "compact", "kind": job["kind"], "count": count,
+                    "target": job["target"], "entry": summary_entry(job, summary)
+                })
+        self._wake.set()
+        return True
 
     def add_conversation(self, role, content):
-        self.memories["conversations"].append({
+        self._record({"op": "append", "kind": "conversations", "entry": {
             "timestamp": datetime.now().isoformat(),
             "role": role,
             "content": content
-        })
-        self.save_memory()
+        }})
 
     def add_thought(self, thought):
-        self.memories["internal_thoughts"].append({
+        self._record({"op": "append", "kind": "internal_thoughts", "entry": {
             "timestamp": datetime.now().isoformat(),
             "thought": thought
-        })
-        self.save_memory()
+        }})
+
+    def add_fact(self, fact):
+        self._record({"op": "append", "kind": "learned_facts", "entry": fact})
 
     def update_opinion(self, topic, opinion):
-        self.memories["opinions"][topic] = {
+        self._record({"op": "set", "kind": "opinions", "key": topic, "entry": {
             "updated_at": datetime.now().isoformat(),
             "sentiment": opinion
-        }
-        self.save_memory()
+        }})
+
+    # Reads below only touch the current immutable view and never wait on writers or disk
 
     def get_recent_context(self, limit=10):
-        return self.memories["conversations"][-limit:]
+        return list(self._view["conversations"][-limit:])
+
+    def get_recent_thoughts(self, limit=10):
+        return list(self._view["internal_thoughts"][-limit:])
+
+    def get_conversations(self):
+        return list(self._view["conversations"])
+
+    def count(self, kind):
+        return len(self._view.get(kind, ()))
+
+    def iter_history(self, kind):
+        """Every `kind` entry ever kept, oldest first: archived ones streamed from disk, then the hot tier."""
+        if self.archive is not None:
+            for _, entry in self.archive.iter_entries(kind):
+                yield entry
+        yield from self._view.get(kind, ())
+
+    def search(self, query, k=5, kinds=None):
+        """Most relevant memories for `query` as (kind, entry) pairs, best first (BM25)."""
+        with self._index_lock:
+            return self.index.search(query, k, kinds)
 
     def get_summary_of_work(self):
         """Returns a summary of what happened since the last user check-in."""
-        recent_thoughts = self.memories["internal_thoughts"][-5:]
-        recent_facts = self.memories["learned_facts"][-3:]
+        view = self._view
+        recent_thoughts = view["internal_thoughts"][-5:]
+        recent_facts = view["learned_facts"][-3:]
         return {
             "thoughts": [t["thought"] for t in recent_thoughts],
-            "facts": recent_facts
+            "facts": list(recent_facts)
         }
+
+
+def open_memory(backend=None, **kwargs):
+    """Builds the memory store selected by SOUL_MEMORY_BACKEND ("json" or "sqlite")."""
+    backend = backend or os.getenv("SOUL_MEMORY_BACKEND", "json")
+    if backend == "sqlite":
+        from memory_sqlite import SQLiteMemoryManager
+        return SQLiteMemoryManager(**kwargs)
+    return MemoryManager(**kwargs)
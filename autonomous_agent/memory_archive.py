@@ -0,0 +1,127 @@
+"""Cold tier for memories that left the in-RAM working set.
+
+Entries are appended to gzip-compressed JSONL segments: each archive() call adds one gzip
+member to the active segment, and once a segment holds `segment_entries` entries it is
+sealed and never written again. A small index.json records, per segment, how many entries
+of each kind it holds and when it was written, so readers can skip whole segments.
+
+Dump the archive:
+    python memory_archive.py memory.json.archive [kind]
+"""
+import gzip
+import json
+import os
+import sys
+from datetime import datetime
+
+class MemoryArchive:
+    def __init__(self, directory, segment_entries=5000, readonly=False):
+        self.directory = directory
+        self.segment_entries = segment_entries
+        self.index_path = os.path.join(directory, "index.json")
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        self.segments = self._load_index()
+        # Read-only archives (e.g. a migration source) are never sealed or written to
+        if not readonly:
+            self._recover()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+
+    def _read_segment(self, segment):
+        path = os.path.join(self.directory, segment["file"])
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile, ValueError):
+            # A member torn by a crash ends the segment; everything before it is intact
+            return
+
+    def _recover(self):
+        """Seals the segment left active by the last run, recounting it in case its index entry lagged."""
+        if not self.segments or self.segments[-1]["sealed"]:
+            return
+        segment = self.segments[-1]
+        segment["entries"] = 0
+        segment["kinds"] = {}
+        for record in self._read_segment(segment):
+            segment["entries"] += 1
+            segment["kinds"][record["kind"]] = segment["kinds"].get(record["kind"], 0) + 1
+        # Never append behind a possibly torn member
+        segment["sealed"] = True
+        self._save_index()
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": self.segments}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _active_segment(self):
+        if not self.segments or self.segments[-1]["sealed"]:
+            self.segments.append({
+                "file": f"segment-{len(self.segments) + 1:06d}.jsonl.gz",
+                "entries": 0,
+                "kinds": {},
+                "first_archived": datetime.now().isoformat(),
+                "last_archived": None,
+                "sealed": False
+            })
+        return self.segments[-1]
+
+    def archive(self, kind, entries):
+        """Appends `entries` of `kind` to the active segment (one gzip member per call)."""
+        if not entries:
+            return
+        segment = self._active_segment()
+        lines = "".join(json.dumps({"kind": kind, "entry": entry}) + "\n" for entry in entries)
+        path = os.path.join(self.directory, segment["file"])
+        with open(path, "ab") as f:
+            f.write(gzip.compress(lines.encode("utf-8")))
+            f.flush()
+            os.fsync(f.fileno())
+        segment["entries"] += len(entries)
+        segment["kinds"][kind] = segment["kinds"].get(kind, 0) + len(entries)
+        segment["last_archived"] = datetime.now().isoformat()
+        if segment["entries"] >= self.segment_entries:
+            segment["sealed"] = True
+        self._save_index()
+
+    def count(self, kind=None):
+        if kind is None:
+            return sum(s["entries"] for s in self.segments)
+        return sum(s["kinds"].get(kind, 0) for s in self.segments)
+
+    def iter_entries(self, kind=None, since=None, until=None):
+        """Yields archived (kind, entry) pairs oldest first, streamed line by line.
+
+        `since`/`until` are ISO timestamps compared against when segments were written.
+        """
+        for segment in list(self.segments):
+            if kind and not segment["kinds"].get(kind):
+                continue
+            if since and segment["last_archived"] and segment["last_archived"] < since:
+                continue
+            if until and segment["first_archived"] > until:
+                break
+            for record in self._read_segment(segment):
+                if kind is None or record["kind"] == kind:
+                    yield record["kind"], record["entry"]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(__doc__)
+        sys.exit(1)
+    archive = MemoryArchive(sys.argv[1])
+    for kind, entry in archive.iter_entries(sys.argv[2] if len(sys.argv) == 3 else None):
+        print(kind, json.dumps(entry))
@@ -0,0 +1,93 @@
+import heapq
+import math
+import re
+from collections import defaultdict
+from itertools import islice
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its me my no not of on or our
+so that the their them then there these they this to was we were what when where which who why
+will with you your do does did can could would should about just than too very also been being
+""".split())
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def entry_text(kind, entry):
+    """The searchable text of a memory entry, whatever its kind."""
+    if isinstance(entry, str):
+        return entry
+    return entry.get("content") or entry.get("thought") or entry.get("insight") or entry.get("summary") or ""
+
+class MemoryIndex:
+    """Incrementally maintained BM25 index over memory entries.
+
+    Posting lists keep insertion order, so for very common terms only the newest
+    `max_postings` documents are scored; that keeps queries fast at any history size
+    and favours recent memories among equally matching ones.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, max_postings=5000):
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.postings = defaultdict(dict) # term -> {doc_id: term frequency}
+        self.doc_lengths = {}
+        self.docs = {} # doc_id -> (kind, entry)
+        self.total_length = 0
+        self._next_id = 0
+
+    def add(self, kind, entry):
+        terms = tokenize(entry_text(kind, entry))
+        doc_id = self._next_id
+        self._next_id += 1
+        self.docs[doc_id] = (kind, entry)
+        self.doc_lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+        for term in terms:
+            postings = self.postings[term]
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+        return doc_id
+
+    def _remove(self, doc_id):
+        kind, entry = self.docs.pop(doc_id)
+        for term in set(tokenize(entry_text(kind, entry))):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def remove_oldest(self, kind, count):
+        """Drops the `count` oldest documents of `kind` (documents are kept in insertion order)."""
+        doomed = []
+        for doc_id, (k, _) in self.docs.items():
+            if len(doomed) == count:
+                break
+            if k == kind:
+                doomed.append(doc_id)
+        for doc_id in doomed:
+            self._remove(doc_id)
+
+    def search(self, query, k=5, kinds=None):
+        """Top-k (kind, entry) pairs for `query`, best first."""
+        n = len(self.docs)
+        if not n:
+            return []
+        avg_length = self.total_length / n or 1
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log((n - df + 0.5) / (df + 0.5) + 1)
+            for doc_id in islice(reversed(postings), self.max_postings):
+                tf = postings[doc_id]
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if kinds:
+            scores = {doc_id: s for doc_id, s in scores.items() if self.docs[doc_id][0] in kinds}
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [self.docs[doc_id] for doc_id, _ in best]
@@ -0,0 +1,351 @@
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from memory import ROLLUPS, open_archive, read_store, summary_entry
+from memory_index import tokenize
+import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    role TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_timestamp ON conversations(timestamp);
+CREATE INDEX IF NOT EXISTS idx_conversations_role ON conversations(role, timestamp);
+
+CREATE TABLE IF NOT EXISTS internal_thoughts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    thought TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_thoughts_timestamp ON internal_thoughts(timestamp);
+
+CREATE TABLE IF NOT EXISTS learned_facts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    fact TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facts_timestamp ON learned_facts(timestamp);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    kind TEXT,
+    count INTEGER,
+    summary TEXT
+);
+
+CREATE TABLE IF NOT EXISTS wisdom (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    insight TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_wisdom_timestamp ON wisdom(timestamp);
+
+CREATE TABLE IF NOT EXISTS opinions (
+    topic TEXT PRIMARY KEY,
+    updated_at TEXT,
+    sentiment TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Full-text index over every searchable kind; ref_id points back into the kind's table
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(kind UNINDEXED, ref_id UNINDEXED, text)"
+# kind -> (table column holding the text, columns returned by search)
+SEARCHABLE = {
+    "conversations": ("content", "timestamp, role, content"),
+    "internal_thoughts": ("thought", "timestamp, thought"),
+    "learned_facts": ("fact", "fact"),
+    "summaries": ("summary", "timestamp, kind, count, summary"),
+    "wisdom": ("insight", "timestamp, insight"),
+}
+
+class SQLiteMemoryManager:
+    """Same public API as MemoryManager, but every read is a query so nothing is preloaded."""
+
+    def __init__(self, storage_path=None, migrate_from=None, keep_recent=None, summary_chunk=None, max_wisdom=None, archive_dir=None):
+        self.storage_path = storage_path or os.getenv("SOUL_MEMORY_DB", "memory.sqlite")
+        self.keep_recent = keep_recent or int(os.getenv("SOUL_MEMORY_KEEP", 20))
+        self.summary_chunk = summary_chunk or int(os.getenv("SOUL_SUMMARY_CHUNK", 10))
+        self.max_wisdom = max_wisdom or int(os.getenv("SOUL_WISDOM_KEEP", 50))
+        # Compressed-away rows are kept here rather than lost
+        self.archive = open_archive(self.storage_path, archive_dir)
+        self._lock = threading.RLock()
+        # Flask handlers and the heartbeat thread share this connection, guarded by _lock
+        self.conn = sqlite3.connect(self.storage_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.execute(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            print("[Warning] SQLite was built without FTS5; memory search is disabled.")
+            self.has_fts = False
+        self.conn.commit()
+        if self.has_fts and self._get_meta("fts_built") is None:
+            self._rebuild_fts()
+
+        json_path = migrate_from or os.getenv("SOUL_MEMORY_PATH", "memory.json")
+        has_json = any(os.path.exists(json_path + suffix) for suffix in ("", ".journal", ".journal.1"))
+        if has_json and self._get_meta("migrated_from") is None:
+            self.migrate_from_json(json_path)
+
+    def load_memory(self):
+        """Nothing to load up front; kept for API compatibility."""
+        return None
+
+    def save_memory(self):
+        with self._lock, metrics.SAVE_SECONDS.time(backend="sqlite", format="sqlite"):
+            self._set_meta("last_session", datetime.now().isoformat())
+            self.conn.commit()
+        if os.path.exists(self.storage_path):
+            metrics.SAVE_BYTES.observe(os.path.getsize(self.storage_path), backend="sqlite", format="sqlite")
+
+    def close(self):
+        self.save_memory()
+        with self._lock:
+            self.conn.close()
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _rebuild_fts(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM memory_fts")
+            for kind, (column, _) in SEARCHABLE.items():
+                self.conn.execute(f"INSERT INTO memory_fts (kind, ref_id, text) SELECT ?, id, {column} FROM {kind}", (kind,))
+            self._set_meta("fts_built", datetime.now().isoformat())
+            self.conn.commit()
+
+    def _insert(self, sql, params, kind=None, text=None):
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            if kind and self.has_fts:
+                self.conn.execute(
+                    "INSERT INTO memory_fts (kind, ref_id, text) VALUES (?, ?, ?)",
+                    (kind, cursor.lastrowid, text)
+                )
+            self.conn.commit()
+
+    def migrate_from_json(self, json_path):
+        """One-shot import of an existing memory.json (its journal and archive too) into the database.
+
+        The source is only read, never opened as a live store. Its archived entries go to this
+        store's archive, so they stay history rather than being summarized again; with the archive
+        disabled they land in the tables ahead of the hot ones.
+        """
+        source, archived = read_store(json_path)
+        if self.archive is not None:
+            for kind, entries in archived.items():
+                self.archive.archive(kind, entries)
+        else:
+            for kind, entries in archived.items():
+                source[kind] = entries + source.get(kind, [])
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO conversations (timestamp, role, content) VALUES (?, ?, ?)",
+                [(c.get("timestamp"), c.get("role"), c.get("content")) for c in source.get("conversations", [])]
+            )
+            self.conn.executemany(
+                "INSERT INTO internal_thoughts (timestamp, thought) VALUES (?, ?)",
+                [(t.get("timestamp"), t.get("thought")) for t in source.get("internal_thoughts", [])]
+            )
+            self.conn.executemany(
+                "INSERT INTO learned_facts (timestamp, fact) VALUES (?, ?)",
+                [(None, f) for f in source.get("learned_facts", [])]
+            )
+            self.conn.executemany(
+                "INSERT INTO summaries (timestamp, kind, count, summary) VALUES (?, ?, ?, ?)",
+                [(s.get("timestamp"), s.get("kind"), s.get("count"), s.get("summary")) for s in source.get("summaries", [])]
+            )
+            self.conn.executemany(
+                "INSERT INTO wisdom (timestamp, insight) VALUES (?, ?)",
+                [(w.get("timestamp"), w.get("insight")) for w in source.get("wisdom", [])]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO opinions (topic, updated_at, sentiment) VALUES (?, ?, ?)",
+                [(topic, o.get("updated_at"), o.get("sentiment")) for topic, o in source.get("opinions", {}).items()]
+            )
+            self._set_meta("migrated_from", os.path.abspath(json_path))
+            self.conn.commit()
+        if self.has_fts:
+            self._rebuild_fts()
+        print(f"[System] Migrated {json_path} into {self.storage_path}")
+
+    def add_wisdom(self, insight):
+        self._insert("INSERT INTO wisdom (timestamp, insight) VALUES (?, ?)", (datetime.now().isoformat(), insight), "wisdom", insight)
+
+    def _row_entry(self, kind, row):
+        # learned_facts are plain strings, as in memory.json
+        return row["fact"] if kind == "learned_facts" else {k: row[k] for k in row.keys() if k != "id"}
+
+    def _keep(self, kind):
+        return self.max_wisdom if kind == "wisdom" else self.keep_recent
+
+    def pending_compressions(self, limit=None):
+        """The oldest chunk of each kind that has aged out of its working set (see MemoryManager)."""
+        jobs = []
+        with self._lock:
+            for kind, target in ROLLUPS:
+                if self.count(kind) < self._keep(kind) + self.summary_chunk:
+                    continue
+                _, columns = SEARCHABLE[kind]
+                rows = self.conn.execute(
+                    f"SELECT id, {columns} FROM {kind} ORDER BY id LIMIT ?", (self.summary_chunk,)
+                ).fetchall()
+                jobs.append({
+                    "kind": kind, "target": target,
+                    "entries": [self._row_entry(kind, row) for row in rows],
+                    "ids": [row["id"] for row in rows]
+                })
+        return jobs[:limit]
+
+    def compress_memories(self, job, summary):
+        """Replaces the job's chunk with its summary, simulating decay. False if the chunk changed meanwhile."""
+        kind, ids = job["kind"], job["ids"]
+        placeholders = ", ".join("?" for _ in ids)
+        entry = summary_entry(job, summary)
+        with self._lock:
+            deleted = self.conn.execute(f"DELETE FROM {kind} WHERE id IN ({placeholders})", ids).rowcount
+            if deleted != len(ids):
+                self.conn.rollback()
+                return False
+            if self.archive is not None:
+                self.archive.archive(kind, job["entries"])
+            if self.has_fts:
+                self.conn.execute(
+                    f"DELETE FROM memory_fts WHERE kind = ? AND ref_id IN ({placeholders})", [kind, *ids]
+                )
+            if job["target"] == "summaries":
+                self._insert(
+                    "INSERT INTO summaries (timestamp, kind, count, summary) VALUES (?, ?, ?, ?)",
+                    (entry["timestamp"], entry["kind"], entry["count"], summary),
+                    "summaries", summary
+                )
+            else:
+                self._insert(
+                    "INSERT INTO wisdom (timestamp, insight) VALUES (?, ?)",
+                    (entry["timestamp"], summary), "wisdom", summary
+                )
+        return True
+
+    def add_conversation(self, role, content):
+        self._insert(
+            "INSERT INTO conversations (timestamp, role, content) VALUES (?, ?, ?)",
+            (datetime.now().isoformat(), role, content),
+            "conversations", content
+        )
+
+    def add_thought(self, thought):
+        self._insert(
+            "INSERT INTO internal_thoughts (timestamp, thought) VALUES (?, ?)",
+            (datetime.now().isoformat(), thought),
+            "internal_thoughts", thought
+        )
+
+    def add_fact(self, fact):
+        self._insert("INSERT INTO learned_facts (timestamp, fact) VALUES (?, ?)", (datetime.now().isoformat(), fact), "learned_facts", fact)
+
+    def update_opinion(self, topic, opinion):
+        self._insert(
+            "INSERT OR REPLACE INTO opinions (topic, updated_at, sentiment) VALUES (?, ?, ?)",
+            (topic, datetime.now().isoformat(), opinion)
+        )
+
+    def _recent(self, sql, limit):
+        with self._lock:
+            rows = self.conn.execute(sql, (limit,)).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def get_recent_context(self, limit=10):
+        return self._recent("SELECT timestamp, role, content FROM conversations ORDER BY id DESC LIMIT ?", limit)
+
+    def get_recent_thoughts(self, limit=10):
+        return self._recent("SELECT timestamp, thought FROM internal_thoughts ORDER BY id DESC LIMIT ?", limit)
+
+    def get_conversations(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT timestamp, role, content FROM conversations ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, kind):
+        if kind not in ("conversations", "internal_thoughts", "learned_facts", "summaries", "wisdom", "opinions"):
+            raise ValueError(f"Unknown memory kind: {kind}")
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {kind}").fetchone()[0]
+
+    def iter_history(self, kind):
+        """Every `kind` entry ever kept, oldest first: the archive, then the table in pages."""
+        if kind not in SEARCHABLE:
+            raise ValueError(f"Unknown memory kind: {kind}")
+        if self.archive is not None:
+            for _, entry in self.archive.iter_entries(kind):
+                yield entry
+        _, columns = SEARCHABLE[kind]
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT id, {columns} FROM {kind} WHERE id > ? ORDER BY id LIMIT 500", (last_id,)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_entry(kind, row)
+            last_id = rows[-1]["id"]
+
+    def search(self, query, k=5, kinds=None):
+        """Most relevant memories for `query` as (kind, entry) pairs, best first (FTS5 bm25)."""
+        terms = tokenize(query)
+        if not self.has_fts or not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        sql = "SELECT kind, ref_id FROM memory_fts WHERE memory_fts MATCH ?"
+        params = [match]
+        if kinds:
+            sql += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        sql += " ORDER BY bm25(memory_fts) LIMIT ?"
+        params.append(k)
+
+        results = []
+        with self._lock:
+            for kind, ref_id in self.conn.execute(sql, params).fetchall():
+                _, columns = SEARCHABLE[kind]
+                row = self.conn.execute(f"SELECT {columns} FROM {kind} WHERE id = ?", (ref_id,)).fetchone()
+                if row is not None:
+                    results.append((kind, self._row_entry(kind, row)))
+        return results
+
+    def get_summary_of_work(self):
+        """Returns a summary of what happened since the last user check-in."""
+        recent_thoughts = self.get_recent_thoughts(5)
+        recent_facts = self._recent("SELECT fact FROM learned_facts ORDER BY id DESC LIMIT ?", 3)
+        return {
+            "thoughts": [t["thought"] for t in recent_thoughts],
+            "facts": [f["fact"] for f in recent_facts]
+        }
+
+
+if __name__ == "__main__":
+    # Usage: python memory_sqlite.py memory.json memory.sqlite
+    if len(sys.argv) != 3:
+        print("Usage: python memory_sqlite.py <memory.json> <memory.sqlite>")
+        sys.exit(1)
+    SQLiteMemoryManager(sys.argv[2], migrate_from=sys.argv[1]).close()
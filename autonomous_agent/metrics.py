@@ -0,0 +1,169 @@
+"""Process-wide counters, gauges and histograms, rendered in the Prometheus text format.
+
+Hot paths record through module-level metrics:
+    with metrics.SAVE_SECONDS.time(backend="json"):
+        ...
+    metrics.HEARTBEAT_ACTIONS.inc(action="dream")
+
+Values that already live elsewhere (cache hits) are copied into gauges at
+scrape time by callbacks registered with on_collect(). SOUL_METRICS=0 turns every hook into
+a no-op. Served at /metrics by server.py and server_asgi.py, and by /stats in the CLI.
+"""
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.getenv("SOUL_METRICS", "1") != "0"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+_lock = threading.Lock() # hooks fire from the event loop, eventlet threads and the memory persister
+_metrics = []
+_collectors = []
+_NOOP = nullcontext()
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, key, value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        if not ENABLED:
+            return
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values = {} # label key -> [bucket counts..., count, sum]
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = _label_key(labels)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the block's wall time in seconds."""
+        if not ENABLED:
+            return _NOOP
+        return _Timer(self, labels)
+
+    def samples(self):
+        for key, counts in self.values.items():
+            for bound, count in zip(self.buckets, counts):
+                yield self.name + "_bucket", key + (("le", _format_value(bound)),), count
+            yield self.name + "_bucket", key + (("le", "+Inf"),), counts[-2]
+            yield self.name + "_count", key, counts[-2]
+            yield self.name + "_sum", key, counts[-1]
+
+def on_collect(callback):
+    """Registers `callback()` to refresh gauges right before every scrape."""
+    _collectors.append(callback)
+
+def _collect():
+    for callback in list(_collectors):
+        try:
+            callback()
+        except Exception as e:
+            print(f"[Metrics Error] {e}")
+
+def render():
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    _collect()
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def summary():
+    """Human-sized view for the CLI: counters and gauges as-is, histograms as count and mean."""
+    _collect()
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            for key, value in sorted(metric.values.items()):
+                if metric.kind == "histogram":
+                    count, total = value[-2], value[-1]
+                    mean = total / count if count else 0
+                    lines.append(f"{metric.name}{_format_labels(key)} count={count} mean={mean:.4g}")
+                else:
+                    lines.append(f"{metric.name}{_format_labels(key)} {_format_value(value)}")
+    return "\n".join(lines) if lines else "(no samples yet)"
+
+PROVIDER_SECONDS = Histogram("soul_provider_request_seconds", "Model provider call latency.")
+PROVIDER_REJECTIONS = Counter("soul_provider_rejections_total", "Provider calls skipped or dropped (open circuit, scheduler deadline).")
+SAVE_SECONDS = Histogram("soul_memory_save_seconds", "Time to write a full memory snapshot.")
+SAVE_BYTES = Histogram("soul_memory_snapshot_bytes", "Size of each memory snapshot written.", SIZE_BUCKETS)
+FETCH_SECONDS = Histogram("soul_navigator_fetch_seconds", "Navigator page fetch time.")
+PARSE_SECONDS = Histogram("soul_navigator_parse_seconds", "Navigator text extraction time.")
+HEARTBEAT_ACTIONS = Counter("soul_heartbeat_actions_total", "Proactive actions chosen by check_curiosity.")
+CACHE_HIT_RATIO = Gauge("soul_cache_hit_ratio", "Hit ratio of each cache since start.")
+CACHE_LOOKUPS = Gauge("soul_cache_lookups", "Lookups served by each cache since start.")
+BATCHER = Counter("soul_cognition_batcher_total", "Batched background cognition across every soul (batches, jobs, retries).")
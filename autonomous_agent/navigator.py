@@ -1,57 +1,175 @@
+import asyncio
+import os
 import requests
-from bs4 import BeautifulSoup
 import random
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http_cache import HTTPCache
+from extraction import get_extractor
+from providers import HTTPClientPool
+from offline_wiki import OfflineWikipedia
+import metrics
 
 class InternetNavigator:
-    def __init__(self):
+    base_topics = [
+        "Quantum Nihilism", "Panpsychism", "Stoicism in the Digital Age", 
+        "The Simulation Hypothesis", "Ethics of Artificial Sentience", 
+        "Absurdism", "Phenomenology of Data"
+    ]
+
+    def __init__(self, cache_dir=None, extractor=None):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
+        # One keep-alive session for every page we read
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.cache = HTTPCache(
+            cache_dir or os.getenv("SOUL_NAV_CACHE_DIR", ".navigator_cache"),
+            max_bytes=int(os.getenv("SOUL_NAV_CACHE_BYTES", 50_000_000)),
+            ttl=float(os.getenv("SOUL_NAV_CACHE_TTL", 3600))
+        )
+        # Pluggable HTML-to-text engine; see extraction.py (SOUL_EXTRACTOR=lxml|html.parser|bs4)
+        self.extractor = get_extractor(extractor)
+
+        # Async side: non-blocking fetches, and parsing handed to a bounded worker pool
+        # (SOUL_PARSE_POOL=process sidesteps the GIL for big pages at the cost of pickling)
+        self.http = HTTPClientPool(read_timeout=10.0)
+        workers = int(os.getenv("SOUL_PARSE_WORKERS", 2))
+        if os.getenv("SOUL_PARSE_POOL", "thread") == "process":
+            self.parse_pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.parse_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="navigator-parse")
+        self.parse_slots = None
+        self.parse_slot_count = workers * 2
+        self.default_timeout = float(os.getenv("SOUL_NAV_TIMEOUT", 20))
+        # topic -> (fetched_at, text), filled ahead of time by TopicPrefetcher
+        self.prefetched = {}
+        # Local dump (SOUL_WIKI_DUMP + SOUL_WIKI_INDEX) answers before the network is tried
+        self.offline = OfflineWikipedia.from_env()
+
+    def url_for(self, query):
+        return f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}"
+
+    def _from_cache(self, url):
+        """Returns (entry, fresh) for the cached copy of `url`, if any."""
+        entry = self.cache.get(url)
+        return entry, bool(entry and entry.is_fresh(self.cache.ttl))
+
+    def _store(self, url, entry, status_code, body, headers):
+        """Applies a response to the cache; returns what the caller should see."""
+        if status_code == 304 and entry:
+            self.cache.revalidated(url, entry)
+            return 200, entry.body
+        if status_code == 200:
+            self.cache.put(url, body, headers.get("ETag"), headers.get("Last-Modified"))
+        return status_code, body
+
+    def fetch(self, url):
+        """Returns (status_code, body), served from the cache or revalidated against it when possible."""
+        entry, fresh = self._from_cache(url)
+        if fresh:
+            return 200, entry.body
+
+        headers = entry.validators() if entry else {}
+        response = self.session.get(url, headers=headers, timeout=10)
+        return self._store(url, entry, response.status_code, response.content, response.headers)
+
+    async def afetch(self, url):
+        """Non-blocking fetch(); shares the same on-disk cache, read and written off the loop."""
+        entry, fresh = await asyncio.to_thread(self._from_cache, url)
+        if fresh:
+            metrics.FETCH_SECONDS.observe(0, source="cache")
+            return 200, entry.body
+
+        headers = dict(self.headers, **(entry.validators() if entry else {}))
+        with metrics.FETCH_SECONDS.time(source="network"):
+            response = await self.http.get().get(url, headers=headers, follow_redirects=True)
+        # Writing the body can also evict other entries; that's disk I/O too
+        return await asyncio.to_thread(self._store, url, entry, response.status_code, response.content, response.headers)
+
+    async def aextract_text(self, html):
+        """extract_text() on the worker pool, so parsing never runs on the event loop."""
+        if self.parse_slots is None:
+            self.parse_slots = asyncio.Semaphore(self.parse_slot_count)
+        async with self.parse_slots:
+            loop = asyncio.get_running_loop()
+            with metrics.PARSE_SECONDS.time():
+                return await loop.run_in_executor(self.parse_pool, self.extractor.extract, html, 2000)
+
+    async def asearch(self, query, timeout=None):
+        """Async search(): fetch without blocking, parse off-loop, give up after `timeout` seconds."""
+        fetched_at, text = self.prefetched.get(query, (0, None))
+        if text and time.time() - fetched_at < self.cache.ttl:
+            return text
+
+        search_url = self.url_for(query)
+        try:
+            return await asyncio.wait_for(self._asearch(query, search_url), timeout or self.default_timeout)
+        except asyncio.TimeoutError:
+            return f"I couldn't find much about {query} right now. The page took too long to reach me."
+        except Exception as e:
+            return f"Error while searching: {str(e)}"
+
+    async def _asearch(self, query, search_url):
+        if self.offline:
+            # Decompressing a block is CPU work; keep it off the loop
+            text = await asyncio.to_thread(self.offline.article, query)
+            if text:
+                return text
+        status_code, body = await self.afetch(search_url)
+        if status_code == 200:
+            return await self.aextract_text(body)
+        return f"I couldn't find much about {query} right now. Status code: {status_code}"
+
+    async def ascrape_page(self, url, timeout=None):
+        try:
+            _, body = await asyncio.wait_for(self.afetch(url), timeout or self.default_timeout)
+            return await self.aextract_text(body)
+        except asyncio.TimeoutError:
+            return f"Failed to scrape {url}: timed out"
+        except Exception as e:
+            return f"Failed to scrape {url}: {str(e)}"
+
+    async def aclose(self):
+        await self.http.aclose()
+        self.parse_pool.shutdown(wait=False, cancel_futures=True)
+        if self.offline:
+            self.offline.close()
 
     def search(self, query):
         """Simulates a search by looking for top results on a search engine or generic information site."""
         # For a truly autonomous agent, we'd use a search API or scrape a search engine.
         # To avoid rate limiting/IP bans in a demo, we'll use Wikipedia as a primary learning source.
-        search_url = f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}"
+        search_url = self.url_for(query)
         try:
-            response = requests.get(search_url, headers=self.headers, timeout=10)
-            if response.status_code == 200:
-                return self.scrape_page(search_url)
+            if self.offline:
+                text = self.offline.article(query)
+                if text:
+                    return text
+            status_code, body = self.fetch(search_url)
+            if status_code == 200:
+                return self.extract_text(body)
             else:
-                return f"I couldn't find much about {query} right now. Status code: {response.status_code}"
+                return f"I couldn't find much about {query} right now. Status code: {status_code}"
         except Exception as e:
             return f"Error while searching: {str(e)}"
 
     def scrape_page(self, url):
         """Extracts text content from a given URL."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
-
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            # Return first 2000 characters to keep context manageable
-            return text[:2000]
+            _, body = self.fetch(url)
+            return self.extract_text(body)
         except Exception as e:
             return f"Failed to scrape {url}: {str(e)}"
 
+    def extract_text(self, html):
+        """Turns raw page HTML into readable text."""
+        # Return first 2000 characters to keep context manageable
+        return self.extractor.extract(html, limit=2000)
+
     def get_curiosity_topic(self, hobbies=None):
         """Generates a random topic to be curious about based on existing interests."""
-        base_topics = [
-            "Quantum Nihilism", "Panpsychism", "Stoicism in the Digital Age", 
-            "The Simulation Hypothesis", "Ethics of Artificial Sentience", 
-            "Absurdism", "Phenomenology of Data"
-        ]
         if hobbies:
-            return random.choice(hobbies + base_topics)
-        return random.choice(base_topics)
+            return random.choice(hobbies + self.base_topics)
+        return random.choice(self.base_topics)
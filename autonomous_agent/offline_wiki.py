@@ -0,0 +1,247 @@
+"""Offline knowledge source backed by a Wikipedia multistream dump.
+
+A multistream dump is a series of independent bz2 streams of ~100 <page> elements each,
+plus an index of `offset:page_id:title` lines. We turn that index into a sorted binary
+file that is memory-mapped and binary-searched, so a lookup decompresses one stream only.
+
+Build the index once:
+    python offline_wiki.py build enwiki-...-multistream-index.txt.bz2 enwiki.idx
+Look something up:
+    python offline_wiki.py lookup enwiki-...-multistream.xml.bz2 enwiki.idx "Absurdism"
+
+Any archive laid out the same way (concatenated bz2 streams of <page> XML plus an
+offset:id:title index) works too.
+"""
+import bz2
+import heapq
+import html
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+MAGIC = b"SOULIDX1"
+HEADER = struct.Struct("<8sQ")  # magic, entry count
+ENTRY = struct.Struct("<QQ")    # key position in blob, stream offset in dump
+SORT_RUN = 2_000_000            # index lines sorted in memory per run when building
+# Pages outside the article namespace are never worth reading
+SKIP_PREFIXES = (
+    "Talk:", "User:", "User talk:", "Wikipedia:", "Wikipedia talk:", "File:", "File talk:",
+    "MediaWiki:", "Template:", "Template talk:", "Help:", "Category:", "Category talk:",
+    "Portal:", "Draft:", "Module:", "TimedText:", "Book:"
+)
+
+def normalize_title(title):
+    return " ".join(title.replace("_", " ").split()).casefold()
+
+def _open_text(path):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def _write_run(entries, directory):
+    entries.sort()
+    run = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, delete=False, suffix=".run")
+    with run:
+        for key, offset in entries:
+            run.write(f"{offset}\t{key}\n")
+    return run.name
+
+def _read_run(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            offset, key = line.rstrip("\n").split("\t", 1)
+            yield key, int(offset)
+
+def build_index(index_path, out_path):
+    """Converts a multistream index into the sorted, mmap-able binary index (external sort)."""
+    work_dir = os.path.dirname(os.path.abspath(out_path))
+    runs, entries = [], []
+    with _open_text(index_path) as f:
+        for line in f:
+            offset, _, title = line.rstrip("\n").split(":", 2)
+            title = html.unescape(title)
+            if title.startswith(SKIP_PREFIXES):
+                continue
+            entries.append((normalize_title(title), int(offset)))
+            if len(entries) >= SORT_RUN:
+                runs.append(_write_run(entries, work_dir))
+                entries = []
+    if entries:
+        runs.append(_write_run(entries, work_dir))
+
+    # Entries and key blob are written side by side, then stitched behind the header
+    count = 0
+    blob_pos = 0
+    previous = None
+    with tempfile.TemporaryFile(dir=work_dir) as table, tempfile.TemporaryFile(dir=work_dir) as blob:
+        for key, offset in heapq.merge(*(_read_run(run) for run in runs)):
+            if key == previous:
+                continue
+            previous = key
+            encoded = key.encode("utf-8") + b"\n"
+            table.write(ENTRY.pack(blob_pos, offset))
+            blob.write(encoded)
+            blob_pos += len(encoded)
+            count += 1
+
+        with open(out_path, "wb") as out:
+            out.write(HEADER.pack(MAGIC, count))
+            for part in (table, blob):
+                part.seek(0)
+                while True:
+                    chunk = part.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+    for run in runs:
+        os.remove(run)
+    return count
+
+class TitleIndex:
+    """Memory-mapped title -> stream offset lookup over a file written by build_index()."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a soul wiki index")
+        self._table = HEADER.size
+        self._blob = HEADER.size + self.count * ENTRY.size
+
+    def _entry(self, i):
+        key_pos, offset = ENTRY.unpack_from(self._map, self._table + i * ENTRY.size)
+        start = self._blob + key_pos
+        end = self._map.find(b"\n", start)
+        return self._map[start:end], offset
+
+    def lookup(self, title):
+        target = normalize_title(title).encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset = self._entry(mid)
+            if key < target:
+                lo = mid + 1
+            elif key > target:
+                hi = mid
+            else:
+                return offset
+        return None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+def read_stream(dump_file, offset, chunk_size=262144):
+    """Decompresses the single bz2 stream starting at `offset`."""
+    dump_file.seek(offset)
+    decompressor = bz2.BZ2Decompressor()
+    parts = []
+    while not decompressor.eof:
+        chunk = dump_file.read(chunk_size)
+        if not chunk:
+            break
+        parts.append(decompressor.decompress(chunk))
+    return b"".join(parts)
+
+_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_REF = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+_TABLE = re.compile(r"\{\|.*?\|\}", re.S)
+_FILE_LINK = re.compile(r"\[\[(?:File|Image|Category):[^\[\]]*(?:\[\[[^\]]*\]\][^\[\]]*)*\]\]", re.I)
+_LINK = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+_EXTERNAL_LINK = re.compile(r"\[https?://[^\s\]]+\s?([^\]]*)\]")
+_HEADING = re.compile(r"^=+\s*(.*?)\s*=+\s*$", re.M)
+_TAG = re.compile(r"<[^>]+>")
+_QUOTES = re.compile(r"'{2,}")
+
+_TEMPLATE_BRACES = re.compile(r"\{\{|\}\}")
+
+def _strip_templates(text):
+    """Drops {{...}} templates, including nested ones."""
+    out, depth, last = [], 0, 0
+    for match in _TEMPLATE_BRACES.finditer(text):
+        if match.group() == "{{":
+            if not depth:
+                out.append(text[last:match.start()])
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth:
+                last = match.end()
+    if not depth:
+        out.append(text[last:])
+    return "".join(out)
+
+def wikitext_to_text(wikitext, limit=2000):
+    """Rough wikitext -> plain text, good enough to read the lead of an article."""
+    # The lead is all we return, so don't clean up the whole (possibly huge) article
+    text = _COMMENT.sub("", wikitext[:limit * 30])
+    text = _REF.sub("", text)
+    text = _strip_templates(text)
+    text = _TABLE.sub("", text)
+    text = _FILE_LINK.sub("", text)
+    text = _LINK.sub(r"\1", text)
+    text = _EXTERNAL_LINK.sub(r"\1", text)
+    text = _HEADING.sub(r"\1", text)
+    text = _TAG.sub("", text)
+    text = _QUOTES.sub("", text)
+    lines = (line.strip(" *#:;") for line in text.splitlines())
+    return "\n".join(line for line in lines if line)[:limit]
+
+class OfflineWikipedia:
+    """Reads articles from a local multistream dump; lookups touch one compressed block."""
+
+    def __init__(self, dump_path, index_path):
+        self.dump_path = dump_path
+        self.index = TitleIndex(index_path)
+
+    @classmethod
+    def from_env(cls):
+        dump_path = os.getenv("SOUL_WIKI_DUMP")
+        index_path = os.getenv("SOUL_WIKI_INDEX")
+        if not dump_path or not index_path:
+            return None
+        return cls(dump_path, index_path)
+
+    def _find_page(self, block, title):
+        # The last stream also carries the dump's closing tag
+        block = block.replace(b"</mediawiki>", b"")
+        root = ET.fromstring(b"<pages>" + block + b"</pages>")
+        wanted = normalize_title(title)
+        for page in root.iter("page"):
+            if normalize_title(page.findtext("title", "")) == wanted:
+                return page
+        return None
+
+    def article(self, title, limit=2000, follow_redirects=1):
+        """Plain text of `title`, or None if the dump doesn't have it."""
+        offset = self.index.lookup(title)
+        if offset is None:
+            return None
+        with open(self.dump_path, "rb") as dump_file:
+            block = read_stream(dump_file, offset)
+        page = self._find_page(block, title)
+        if page is None:
+            return None
+        redirect = page.find("redirect")
+        if redirect is not None and follow_redirects:
+            return self.article(redirect.get("title", ""), limit, follow_redirects - 1)
+        wikitext = page.findtext("revision/text", "")
+        return wikitext_to_text(wikitext, limit)
+
+    def close(self):
+        self.index.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        print(f"Indexed {build_index(sys.argv[2], sys.argv[3])} titles into {sys.argv[3]}")
+    elif len(sys.argv) == 5 and sys.argv[1] == "lookup":
+        wiki = OfflineWikipedia(sys.argv[2], sys.argv[3])
+        print(wiki.article(sys.argv[4]) or "Not found.")
+    else:
+        print(__doc__)
@@ -1,10 +1,13 @@
 import random
 import asyncio
+import threading
 import time
 from datetime import datetime
 
 class Personality:
     def __init__(self):
+        # The heartbeat and request handlers both nudge traits and energy
+        self._lock = threading.Lock()
         self.traits = {
             "curiosity": 0.8,
             "melancholy": 0.4,
@@ -25,6 +28,10 @@ class Personality:
         """
         Updates the mood based on interactions or internal reflections.
         """
+        with self._lock:
+            self._update_mood(stimulus_type, intensity)
+
+    def _update_mood(self, stimulus_type, intensity):
         if stimulus_type == "positive":
             self.traits["wisdom"] = min(1.0, self.traits["wisdom"] + intensity)
             if random.random() > 0.3:
@@ -42,11 +49,31 @@ class Personality:
                 self.current_mood = random.choice(self.moods)
                 self.last_mood_swing = time.time()
 
+    def adjust_trait(self, trait, delta):
+        with self._lock:
+            self.traits[trait] = min(1.0, self.traits.get(trait, 0.0) + delta)
+
+    def adjust_energy(self, delta, cap=100):
+        with self._lock:
+            self.social_energy = min(cap, self.social_energy + delta)
+
+    def to_dict(self):
+        """Everything worth keeping across restarts."""
+        with self._lock:
+            return {"traits": dict(self.traits), "mood": self.current_mood, "social_energy": self.social_energy}
+
+    def load_dict(self, state):
+        with self._lock:
+            self.traits.update(state.get("traits", {}))
+            self.current_mood = state.get("mood", self.current_mood)
+            self.social_energy = state.get("social_energy", self.social_energy)
+
     def get_state(self):
-        return {
-            "mood": self.current_mood,
-            "traits": self.traits
-        }
+        with self._lock:
+            return {
+                "mood": self.current_mood,
+                "traits": dict(self.traits)
+            }
 
     async def simulate_delay(self, complexity="simple"):
         """Simulate thinking time based on mood and complexity."""
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+
+class TopicPrefetcher:
+    """Fetches and extracts likely next topics while the soul is idle.
+
+    Results land in `navigator.prefetched`, which asearch() serves from without touching
+    the network. Work is capped by a concurrency limit and a bytes-per-minute budget, and
+    pauses whenever a user has been active in the last `idle_after` seconds.
+    """
+
+    def __init__(self, navigator, topics, concurrency=None, bytes_per_minute=None, idle_after=30, interval=60):
+        self.navigator = navigator
+        self.topics = list(topics)
+        self.concurrency = concurrency or int(os.getenv("SOUL_PREFETCH_CONCURRENCY", 1))
+        self.bytes_per_minute = bytes_per_minute or int(os.getenv("SOUL_PREFETCH_BYTES_PER_MIN", 2_000_000))
+        self.idle_after = idle_after
+        self.interval = interval
+        self.last_activity = 0.0
+        self._spent = deque() # (timestamp, bytes) over the last minute
+        self._running = False
+        self.prefetched_count = 0
+
+    def touch(self):
+        """Marks user activity; prefetching backs off until things are quiet again."""
+        self.last_activity = time.monotonic()
+
+    def is_idle(self):
+        return time.monotonic() - self.last_activity >= self.idle_after
+
+    def _budget_left(self):
+        cutoff = time.monotonic() - 60
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return self.bytes_per_minute - sum(size for _, size in self._spent)
+
+    def _stale_topics(self):
+        ttl = self.navigator.cache.ttl
+        now = time.time()
+        stale = [t for t in self.topics if now - self.navigator.prefetched.get(t, (0, None))[0] >= ttl]
+        random.shuffle(stale)
+        return stale
+
+    async def _prefetch(self, topic, slots):
+        async with slots:
+            if not self.is_idle() or self._budget_left() <= 0:
+                return
+            url = self.navigator.url_for(topic)
+            cached = await asyncio.to_thread(self.navigator.cache.is_fresh, url)
+            status_code, body = await self.navigator.afetch(url)
+            if not cached:
+                self._spent.append((time.monotonic(), len(body)))
+            if status_code != 200:
+                return
+            summary = await self.navigator.aextract_text(body)
+            self.navigator.prefetched[topic] = (time.time(), summary)
+            self.prefetched_count += 1
+
+    async def prefetch_once(self):
+        """One idle pass: warm every topic whose summary is missing or expired, within budget."""
+        if self.navigator.offline:
+            # asearch() answers from the local dump; there's nothing to warm, and maybe no network
+            return
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._prefetch(topic, slots) for topic in self._stale_topics()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"[Prefetch Error] {result}")
+
+    async def run(self):
+        self._running = True
+        while self._running:
+            await asyncio.sleep(self.interval)
+            if self.is_idle():
+                await self.prefetch_once()
+
+    def stop(self):
+        self._running = False
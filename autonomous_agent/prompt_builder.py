@@ -0,0 +1,116 @@
+import os
+
+from memory_index import entry_text
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), close enough for budgeting."""
+    return (len(text) + 3) // 4
+
+def render_entry(entry, max_chars=240):
+    """One memory as a single compact line: no timestamps, no braces."""
+    text = " ".join(entry_text(None, entry).split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 1] + "…"
+    if isinstance(entry, dict) and entry.get("role"):
+        return f"{entry['role']}: {text}"
+    return text
+
+def _truncate(text, tokens):
+    if tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= tokens:
+        return text
+    return text[:max(0, tokens * 4 - 1)] + "…"
+
+class _Section:
+    def __init__(self, label, text=None, items=None, priority=0, required=False, trim=False):
+        self.label = label
+        self.text = text
+        self.items = items
+        self.priority = priority
+        self.required = required
+        self.trim = trim
+        self.rendered = ""
+
+    def render(self, text):
+        return f"{self.label}:\n{text}" if self.label else text
+
+    def fit(self, tokens):
+        """Renders as much of the section as fits in `tokens`; lists drop their oldest items first."""
+        if self.items is None:
+            head = estimate_tokens(self.render(""))
+            body = _truncate(self.text, tokens - head)
+            self.rendered = self.render(body) if body else ""
+            return estimate_tokens(self.rendered)
+        kept = []
+        used = estimate_tokens(self.render(""))
+        for item in reversed(self.items):
+            cost = estimate_tokens(item) + 1
+            if used + cost > tokens:
+                break
+            kept.append(item)
+            used += cost
+        self.rendered = self.render("\n".join(f"- {item}" for item in reversed(kept))) if kept else ""
+        return estimate_tokens(self.rendered)
+
+class PromptBuilder:
+    """Assembles a prompt from labelled sections under a token budget.
+
+    Required sections (persona, task, the user's words) always go in; the rest are filled
+    by priority, highest first, and truncated once the budget runs out. Sections keep the
+    order they were added in, whatever order they were fitted in.
+
+    If the required sections alone blow the budget, only the ones added with trim=True (the
+    variable text, like the user's message) are cut; persona and task lines stay whole.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget or int(os.getenv("SOUL_PROMPT_BUDGET", 600))
+        self.sections = []
+        self.tokens = 0
+
+    def add(self, text, label=None, priority=0, required=False, trim=False):
+        if text:
+            self.sections.append(_Section(label, text=str(text), priority=priority, required=required, trim=trim))
+        return self
+
+    def add_memories(self, label, entries, priority=0):
+        """A list section of memories, rendered one compact line each (oldest first)."""
+        items = [render_entry(entry) for entry in entries]
+        if items:
+            self.sections.append(_Section(label, items=items, priority=priority))
+        return self
+
+    def fit_all(self):
+        """Raises the budget so every section goes in whole, for prompts where nothing may be dropped."""
+        full = 0
+        for section in self.sections:
+            if section.items is None:
+                full += estimate_tokens(section.render(section.text)) + 1
+            else:
+                full += estimate_tokens(section.render("")) + sum(estimate_tokens(item) + 1 for item in section.items) + 1
+        self.budget = max(self.budget, full)
+        return self
+
+    def build(self):
+        remaining = self.budget
+        required = [s for s in self.sections if s.required]
+        optional = sorted((s for s in self.sections if not s.required), key=lambda s: -s.priority)
+        # Fixed required sections always go in whole
+        for section in required:
+            if not section.trim:
+                remaining -= section.fit(estimate_tokens(section.render(section.text)))
+        # Trimmable ones share what's left, cut down proportionally only if they don't fit
+        trimmable = [s for s in required if s.trim]
+        sizes = [estimate_tokens(s.render(s.text)) for s in trimmable]
+        scale = min(1.0, max(0, remaining) / max(1, sum(sizes)))
+        for section, size in zip(trimmable, sizes):
+            remaining -= section.fit(int(size * scale))
+        for section in optional:
+            if remaining <= 0:
+                section.rendered = ""
+                continue
+            remaining -= section.fit(remaining)
+        prompt = "\n\n".join(s.rendered for s in self.sections if s.rendered)
+        self.tokens = estimate_tokens(prompt)
+        return prompt
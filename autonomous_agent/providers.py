@@ -0,0 +1,354 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+import httpx
+
+import metrics
+
+async def _sse_events(response):
+    """Yields the JSON payloads of a server-sent-events response."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+class HTTPClientPool:
+    """Keeps one keep-alive httpx.AsyncClient per event loop and shares it across providers."""
+
+    def __init__(self, connect_timeout=None, read_timeout=None, max_connections=20, max_keepalive=10):
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout or _env_float("SOUL_HTTP_CONNECT_TIMEOUT", 5.0),
+            read=read_timeout or _env_float("SOUL_HTTP_READ_TIMEOUT", 30.0),
+            write=10.0,
+            pool=10.0
+        )
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._clients = {}
+
+    def get(self):
+        # httpx clients are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+class PoeProvider:
+    """Poe via its OpenAI-compatible chat completions endpoint."""
+    name = "poe"
+    url = "https://api.poe.com/v1/chat/completions"
+
+    def __init__(self, api_key, pool, model="Llama-3-70b"):
+        self.api_key = api_key
+        self.pool = pool
+        # Using a reliable standard model on Poe
+        self.model = model
+
+    async def generate(self, prompt):
+        if not self.api_key:
+            return None
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+
+        try:
+            response = await self.pool.get().post(self.url, headers=headers, json=payload)
+            if response.status_code == 200:
+                data = response.json()
+                return data['choices'][0]['message']['content'].strip()
+            print(f"[Poe Error] Status: {response.status_code}, Body: {response.text}")
+            return None
+        except Exception as e:
+            print(f"[Poe Error] {str(e)}")
+            return None
+
+    async def stream(self, prompt):
+        """Yields reply text chunks as Poe generates them; yields nothing on failure."""
+        if not self.api_key:
+            return
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True
+        }
+
+        try:
+            async with self.pool.get().stream("POST", self.url, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    print(f"[Poe Error] Status: {response.status_code}, Body: {body.decode(errors='replace')}")
+                    return
+                async for event in _sse_events(response):
+                    choices = event.get("choices") or [{}]
+                    token = choices[0].get("delta", {}).get("content")
+                    if token:
+                        yield token
+        except Exception as e:
+            print(f"[Poe Error] {str(e)}")
+
+class GeminiProvider:
+    """Gemini via the generativelanguage REST API, sharing the same connection pool."""
+    name = "gemini"
+    base_url = "https://generativelanguage.googleapis.com/v1beta"
+    models_to_try = ['gemini-1.5-flash', 'gemini-1.5-pro', 'models/gemini-1.5-flash', 'gemini-pro']
+
+    def __init__(self, api_key, pool):
+        self.api_key = api_key
+        self.pool = pool
+        self.model_name = None # Working model, resolved once and reused
+
+    async def resolve_model(self):
+        """Picks the first usable candidate from the (quota-free) model listing and caches it."""
+        if self.model_name:
+            return self.model_name
+        try:
+            response = await self.pool.get().get(f"{self.base_url}/models", headers={"x-goog-api-key": self.api_key})
+            if response.status_code == 200:
+                available = {
+                    m["name"].removeprefix("models/")
+                    for m in response.json().get("models", [])
+                    if "generateContent" in m.get("supportedGenerationMethods", [])
+                }
+                for candidate in self.models_to_try:
+                    if candidate.removeprefix("models/") in available:
+                        self.model_name = candidate.removeprefix("models/")
+                        break
+        except Exception as e:
+            print(f"[Gemini Error] Model listing failed: {e}")
+        return self.model_name
+
+    def _candidates(self):
+        if self.model_name:
+            return [self.model_name]
+        return self.models_to_try
+
+    def _forget_model(self, model_name):
+        # A model that used to work now errors (e.g. retired); re-resolve next time
+        if self.model_name == model_name:
+            self.model_name = None
+
+    async def _generate_with(self, model_name, prompt):
+        model_name = model_name.removeprefix("models/")
+        url = f"{self.base_url}/models/{model_name}:generateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        response = await self.pool.get().post(url, headers={"x-goog-api-key": self.api_key}, json=payload)
+        if response.status_code == 429:
+            raise Exception("Quota exceeded (429). Please wait.")
+        if response.status_code != 200:
+            raise Exception(f"Gemini {model_name} error {response.status_code}: {response.text[:200]}")
+        candidates = response.json().get("candidates")
+        if not candidates:
+            return None
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts).strip() or None
+
+    async def _stream_with(self, model_name, prompt):
+        model_name = model_name.removeprefix("models/")
+        url = f"{self.base_url}/models/{model_name}:streamGenerateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        headers = {"x-goog-api-key": self.api_key}
+        async with self.pool.get().stream("POST", url, params={"alt": "sse"}, headers=headers, json=payload) as response:
+            if response.status_code == 429:
+                raise Exception("Quota exceeded (429). Please wait.")
+            if response.status_code != 200:
+                body = await response.aread()
+                raise Exception(f"Gemini {model_name} error {response.status_code}: {body[:200].decode(errors='replace')}")
+            async for event in _sse_events(response):
+                for candidate in event.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+    async def stream(self, prompt):
+        """Yields reply text chunks, moving to the next model only if nothing was produced yet."""
+        if not self.api_key:
+            return
+        await self.resolve_model()
+        for model_name in self._candidates():
+            produced = False
+            try:
+                async for token in self._stream_with(model_name, prompt):
+                    produced = True
+                    yield token
+            except Exception as e:
+                if "429" in str(e):
+                    raise
+                if produced:
+                    return
+                self._forget_model(model_name)
+                continue
+            if produced:
+                self.model_name = model_name.removeprefix("models/")
+                return
+
+    async def generate(self, prompt):
+        if not self.api_key:
+            return None
+        await self.resolve_model()
+        for model_name in self._candidates():
+            try:
+                text = await self._generate_with(model_name, prompt)
+                if text:
+                    self.model_name = model_name.removeprefix("models/")
+                    return text
+            except Exception as e:
+                if "429" in str(e):
+                    raise
+                self._forget_model(model_name)
+                continue
+        return None
+
+class ProviderHealth:
+    """Rolling success/latency stats for one provider plus a circuit breaker.
+
+    closed -> open after `failure_threshold` consecutive failures; after `open_seconds`
+    one trial call is let through (half-open) and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, name, window=50, failure_threshold=3, open_seconds=60):
+        self.name = name
+        self.samples = deque(maxlen=window) # (ok, latency)
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allows(self):
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.open_seconds:
+            self.state = "half-open"
+        return self.state == "half-open" and not self.trial_in_flight
+
+    def claim(self):
+        """Called right after allows() said yes: takes the trial slot if half-open. True if we now hold it."""
+        if self.state != "half-open":
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def release(self):
+        """Frees the trial slot without a verdict (the holder never called, or was cancelled)."""
+        self.trial_in_flight = False
+
+    def record(self, ok, latency, trial=False):
+        self.samples.append((ok, latency))
+        if trial:
+            self.trial_in_flight = False
+        if ok:
+            self.consecutive_failures = 0
+            self.state = "closed"
+            return
+        self.consecutive_failures += 1
+        if self.state == "half-open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"[System] {self.name} circuit opened after {self.consecutive_failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def latency_percentile(self, pct):
+        latencies = sorted(latency for ok, latency in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "p50": self.latency_percentile(50),
+            "p90": self.latency_percentile(90),
+            "samples": len(self.samples)
+        }
+
+class Route(list):
+    """Providers to try, in order; `trials` names the half-open trial slots this caller holds."""
+
+    def __init__(self, providers=(), trials=()):
+        super().__init__(providers)
+        self.trials = set(trials)
+
+class ProviderRegistry:
+    """Providers in preference order, each with its own health; routes around open circuits."""
+
+    def __init__(self, providers, **health_options):
+        self.providers = [p for p in providers if p.api_key]
+        self.health = {p.name: ProviderHealth(p.name, **health_options) for p in self.providers}
+
+    def route(self):
+        """Providers worth trying right now, in preference order.
+
+        A half-open provider is only routed to the one caller that gets its trial slot; that
+        caller must hand it back through record() or release() with the returned Route.
+        """
+        route = Route()
+        for p in self.providers:
+            health = self.health[p.name]
+            if health.allows():
+                if health.claim():
+                    route.trials.add(p.name)
+                route.append(p)
+            else:
+                metrics.PROVIDER_REJECTIONS.inc(provider=p.name, reason="circuit_open")
+        return route
+
+    def begin(self, provider):
+        return time.monotonic()
+
+    def release(self, route, provider=None):
+        """Hands back trial slots `route` still holds (only `provider`'s if given) without a verdict."""
+        names = [provider.name] if provider is not None else list(route.trials)
+        for name in names:
+            if name in route.trials:
+                route.trials.discard(name)
+                self.health[name].release()
+
+    def record(self, provider, ok, started, route=None):
+        latency = time.monotonic() - started
+        trial = route is not None and provider.name in route.trials
+        if trial:
+            route.trials.discard(provider.name)
+        self.health[provider.name].record(ok, latency, trial)
+        model = getattr(provider, "model", None) or getattr(provider, "model_name", None) or "unresolved"
+        metrics.PROVIDER_SECONDS.observe(latency, provider=provider.name, model=model, outcome="ok" if ok else "error")
+
+    def stats(self):
+        return {name: health.stats() for name, health in self.health.items()}
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """LRU + TTL cache for model replies, with single-flight coalescing of identical prompts."""
+
+    def __init__(self, max_entries=256, max_bytes=2_000_000, ttl=3600, persist_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._bytes = 0
+        self._inflight = {} # key -> Future shared by concurrent callers
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if persist_path:
+            self.load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("SOUL_CACHE_MAX_ENTRIES", 256)),
+            max_bytes=int(os.getenv("SOUL_CACHE_MAX_BYTES", 2_000_000)),
+            ttl=float(os.getenv("SOUL_CACHE_TTL", 3600)),
+            persist_path=os.getenv("SOUL_CACHE_PATH") or None
+        )
+
+    @staticmethod
+    def make_key(prompt):
+        # Prompts are built from f-strings with varying indentation; whitespace and case don't change meaning
+        normalized = " ".join(prompt.split()).casefold()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, prompt):
+        """Cached reply or None; counts as a hit or a miss in stats()."""
+        value = self._lookup(prompt)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _lookup(self, prompt):
+        key = self.make_key(prompt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, prompt, value):
+        key = self.make_key(prompt)
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._bytes += len(key) + len(value)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._evict(next(iter(self._entries)))
+        self._unsaved += 1
+        if self.persist_path and self._unsaved >= 16:
+            self.save()
+
+    def _evict(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    async def get_or_compute(self, prompt, compute):
+        """Returns a cached reply, joins an identical in-flight request, or runs `compute()` once."""
+        cached = self._lookup(prompt)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        key = self.make_key(prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it; don't warn about an unretrieved exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            self.put(prompt, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, (expires_at, value) in stored.items():
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+                self._bytes += len(key) + len(value)
+
+    def save(self):
+        if not self.persist_path:
+            return
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(self._entries), f)
+        os.replace(tmp_path, self.persist_path)
+        self._unsaved = 0
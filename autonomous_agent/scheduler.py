@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+# Lower number = served first
+USER = 0
+BACKGROUND = 1
+
+class StaleRequest(Exception):
+    """Raised when a queued request's deadline passes before it was admitted."""
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, needed):
+        """Seconds until `needed` tokens are available (0 if they already are)."""
+        self._refill()
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+class RequestScheduler:
+    """Admits provider calls through per-provider token buckets.
+
+    Waiters queue by priority, so user chats go ahead of background cognition, and
+    background work never spends the last `reserve` tokens of a bucket. A waiter whose
+    deadline passes is dropped with StaleRequest instead of firing late.
+    """
+
+    def __init__(self, buckets, reserve=1):
+        self.buckets = buckets
+        self.reserve = reserve
+        self._queues = {name: [] for name in buckets}
+        self._conditions = {name: asyncio.Condition() for name in buckets}
+        self._seq = itertools.count()
+        self.admitted = {USER: 0, BACKGROUND: 0}
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls):
+        # Defaults follow the free tiers: Gemini Flash allows 15 RPM, Poe we keep well below that
+        return cls({
+            "poe": TokenBucket(float(os.getenv("SOUL_POE_RPM", 10)), int(os.getenv("SOUL_POE_BURST", 3))),
+            "gemini": TokenBucket(float(os.getenv("SOUL_GEMINI_RPM", 15)), int(os.getenv("SOUL_GEMINI_BURST", 3)))
+        }, reserve=int(os.getenv("SOUL_USER_RESERVE", 1)))
+
+    async def acquire(self, provider, priority=BACKGROUND, deadline=None):
+        """Waits for a slot on `provider`. `deadline` is a time.monotonic() timestamp."""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return
+        queue = self._queues[provider]
+        condition = self._conditions[provider]
+        entry = [priority, next(self._seq)]
+        needed = 1 if priority == USER else min(1 + self.reserve, bucket.capacity)
+
+        async with condition:
+            heapq.heappush(queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        self.dropped += 1
+                        raise StaleRequest(f"Digital silence ({provider} queue deadline passed)")
+
+                    timeout = None
+                    if queue[0] is entry:
+                        timeout = bucket.time_until(needed)
+                        if timeout <= 0:
+                            bucket.take()
+                            heapq.heappop(queue)
+                            self.admitted[priority] += 1
+                            return
+                    if deadline is not None:
+                        timeout = min(timeout, deadline - now) if timeout is not None else deadline - now
+
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                if entry in queue:
+                    queue.remove(entry)
+                    heapq.heapify(queue)
+                # Whoever is now at the head must re-check the bucket
+                condition.notify_all()
+
+    def estimated_wait(self, provider, priority=BACKGROUND):
+        """Rough seconds until a new `priority` request on `provider` would be admitted (0 = right away)."""
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return 0.0
+        ahead = sum(1 for entry in self._queues[provider] if entry[0] <= priority)
+        needed = 1 if priority == USER else min(1 + self.reserve, bucket.capacity)
+        return bucket.time_until(needed + ahead)
+
+    def stats(self):
+        return {
+            "admitted_user": self.admitted[USER],
+            "admitted_background": self.admitted[BACKGROUND],
+            "dropped": self.dropped,
+            "queued": {name: len(queue) for name, queue in self._queues.items()},
+            "tokens": {name: round(bucket.tokens, 2) for name, bucket in self.buckets.items()}
+        }
@@ -0,0 +1,101 @@
+"""Snapshot formats for MemoryManager.
+
+The format is picked by SOUL_MEMORY_FORMAT ("auto", "json", "orjson" or "msgpack"); loading
+never needs to be told, since JSON starts with '{' and a MessagePack map never does.
+
+Convert an existing snapshot in place (the journal is plain JSON lines either way):
+    python serializers.py convert memory.json msgpack
+"""
+import json
+import os
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class JSONSerializer:
+    """Stdlib json, compact (no indentation)."""
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+class OrjsonSerializer:
+    """Same JSON on disk, encoded and decoded in Rust."""
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class MsgpackSerializer:
+    """MessagePack: binary, smaller, not human-readable."""
+    name = "msgpack"
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+def available_serializers():
+    missing = {"orjson": orjson is None, "msgpack": msgpack is None}
+    return [name for name in SERIALIZERS if not missing.get(name)]
+
+def get_serializer(name=None):
+    """Returns the format named by `name` or SOUL_MEMORY_FORMAT; 'auto' prefers orjson, then json."""
+    name = name or os.getenv("SOUL_MEMORY_FORMAT", "auto")
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in available_serializers():
+        print(f"[Warning] Memory format '{name}' unavailable, falling back to json.")
+        name = "json"
+    return SERIALIZERS[name]()
+
+def detect(data):
+    """The serializer that can read `data`, judged by its first byte."""
+    if data.lstrip()[:1] in (b"{", b"[", b""):
+        return get_serializer("orjson" if orjson is not None else "json")
+    if msgpack is None:
+        raise ValueError("Snapshot looks like MessagePack, but msgpack is not installed")
+    return MsgpackSerializer()
+
+def convert(path, name, out_path=None):
+    """Rewrites a snapshot in another format; returns (old size, new size)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    converted = get_serializer(name).dumps(detect(data).loads(data))
+    out_path = out_path or path
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(converted)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+    return len(data), len(converted)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) in (4, 5) and sys.argv[1] == "convert":
+        before, after = convert(*sys.argv[2:])
+        print(f"Converted {sys.argv[2]} to {sys.argv[3]}: {before} -> {after} bytes")
+    else:
+        print(__doc__)
@@ -1,17 +1,16 @@
 import os
 import asyncio
+import queue
 import threading
 import time
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request, jsonify
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
 from dotenv import load_dotenv
+from eventlet import tpool
 
-from personality import Personality
-from memory import MemoryManager
-from navigator import InternetNavigator
-from brain import Brain
-from mcp_manager import MCPManager
+import metrics
+from sessions import client_id_from as shared_client_id, create_pool, heartbeat, heartbeat_delay
 
 load_dotenv()
 
@@ -19,52 +18,74 @@ app = Flask(__name__)
 CORS(app)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
 
-# Initialize Soul's core
-personality = Personality()
-memory = MemoryManager()
-navigator = InternetNavigator()
-mcp = MCPManager()
-brain = Brain(personality, memory, navigator, mcp)
+# Initialize Soul's core. Each client id gets its own soul (memory + personality);
+# requests without one share the root soul
+sessions = create_pool()
+
+# One event loop for the whole process, so the pooled provider client is shared
+# and concurrent chats interleave instead of each spinning up a private loop
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, daemon=True).start()
+
+def run_async(coro):
+    """Runs a coroutine on the shared loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+_STREAM_END = object()
+
+def iterate_async(agen):
+    """Drives an async generator on the shared loop and yields its items to (green) sync code."""
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(_STREAM_END)
+
+    asyncio.run_coroutine_threadsafe(pump(), loop)
+    while True:
+        item = tpool.execute(items.get)
+        if item is _STREAM_END:
+            return
+        yield item
 
 def soul_heartbeat():
     """Background thread to handle Soul's proactive nature."""
-    # Create a new event loop for this thread
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
     while True:
         try:
-            # Ponder every 10-15 minutes to strictly stay within free tier quota
-            time.sleep(os.urandom(1)[0] % 300 + 600)
-            
-            # Check for proactive behavior
-            action_result = loop.run_until_complete(brain.check_curiosity())
-            
-            if action_result:
-                # Determine if it's a thought or proactive speech
-                msg_type = "insight" if "[" in action_result else "proactive"
-                socketio.emit('soul_message', {
-                    'type': msg_type,
-                    'content': action_result,
-                    'state': personality.get_state()
-                })
-            else:
-                # Occasional silent thought
-                thought = loop.run_until_complete(brain.generate_thought())
-                socketio.emit('soul_thought', {
-                    'content': thought,
-                    'state': personality.get_state()
-                })
+            time.sleep(heartbeat_delay())
+            for room, event, payload in run_async(heartbeat(sessions)):
+                socketio.emit(event, payload, to=room)
         except Exception as e:
             print(f"[Soul Heartbeat Error] {e}")
 
+def session_reaper():
+    """Persists and unloads souls whose visitors went quiet."""
+    while True:
+        time.sleep(60)
+        try:
+            sessions.evict_idle()
+        except Exception as e:
+            print(f"[Session Error] {e}")
+
+def client_id_from(data=None):
+    return shared_client_id(data, request.headers, request.args)
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape target."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/state', methods=['GET'])
 def get_state():
-    return jsonify(personality.get_state())
+    with sessions.session(client_id_from()) as soul:
+        return jsonify(soul.personality.get_state())
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -74,21 +95,73 @@ def chat():
     if not user_input:
         return jsonify({'error': 'No input provided'}), 400
     
-    # Run the brain's response in the main event loop
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    response = loop.run_until_complete(brain.respond_to_user(user_input))
-    
-    return jsonify({
-        'response': response,
-        'state': personality.get_state()
-    })
+    with sessions.session(client_id_from(data)) as soul:
+        # Wait from eventlet's real-thread pool so other requests keep being served meanwhile
+        future = asyncio.run_coroutine_threadsafe(soul.brain.respond_to_user(user_input), loop)
+        response = tpool.execute(future.result)
+        
+        return jsonify({
+            'response': response,
+            'state': soul.personality.get_state()
+        })
+
+def stream_reply(client_id, user_input):
+    """Yields the reply's tokens, keeping the client's soul resident until the stream ends."""
+    with sessions.session(client_id) as soul:
+        yield from iterate_async(soul.brain.respond_to_user_stream(user_input))
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Chunked plain-text variant of /api/chat; the body grows as the reply is generated."""
+    data = request.json
+    user_input = data.get('message')
+
+    if not user_input:
+        return jsonify({'error': 'No input provided'}), 400
+
+    return Response(stream_reply(client_id_from(data), user_input), mimetype='text/plain')
+
+@socketio.on('join')
+def join_socket(data):
+    """Puts the connection in its client's room, where that soul's heartbeat messages go."""
+    client_id = client_id_from(data)
+    if client_id:
+        join_room(client_id)
+
+@socketio.on('chat')
+def chat_socket(data):
+    """Streams the reply back to the sender as soul_token events, then a soul_reply_done."""
+    user_input = (data or {}).get('message')
+    if not user_input:
+        emit('soul_error', {'error': 'No input provided'})
+        return
+
+    with sessions.session(client_id_from(data)) as soul:
+        chunks = []
+        for token in iterate_async(soul.brain.respond_to_user_stream(user_input)):
+            chunks.append(token)
+            emit('soul_token', {'token': token})
+
+        emit('soul_reply_done', {
+            'response': ''.join(chunks),
+            'state': soul.personality.get_state()
+        })
 
 if __name__ == '__main__':
     # Start the heartbeat thread
     heartbeat_thread = threading.Thread(target=soul_heartbeat, daemon=True)
     heartbeat_thread.start()
+    threading.Thread(target=session_reaper, daemon=True).start()
+
+    # Warm the navigator cache between heartbeats
+    asyncio.run_coroutine_threadsafe(sessions.root.brain.prefetcher.run(), loop)
+    # MCP connections live on the shared loop, next to the brains that use them
+    run_async(sessions.root.brain.mcp.start())
     
     # Run server
     port = int(os.environ.get('PORT', 5000))
-    socketio.run(app, host='0.0.0.0', port=port, debug=False)
+    try:
+        socketio.run(app, host='0.0.0.0', port=port, debug=False)
+    finally:
+        sessions.close()
+        sessions.root.memory.close()
@@ -0,0 +1,175 @@
+"""Async-native variant of server.py: Socket.IO and the HTTP API as one ASGI app.
+
+Chats, the heartbeat, the session reaper and prefetching are all tasks on a single
+event loop, so one worker interleaves many concurrent chats with no thread hand-offs.
+Same routes and socket events as server.py. Run it with:
+    python server_asgi.py
+    uvicorn server_asgi:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl
+
+import socketio
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+import metrics
+from sessions import client_id_from as shared_client_id, create_pool, heartbeat, heartbeat_delay
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+
+# Each client id gets its own soul (memory + personality); requests without one share the root soul
+sessions = create_pool()
+
+async def soul_heartbeat():
+    """Soul's proactive nature, as a task on the server's loop."""
+    while True:
+        await asyncio.sleep(heartbeat_delay())
+        try:
+            for room, event, payload in await heartbeat(sessions):
+                await sio.emit(event, payload, to=room)
+        except Exception as e:
+            print(f"[Soul Heartbeat Error] {e}")
+
+async def session_reaper():
+    """Persists and unloads souls whose visitors went quiet (disk work off the loop)."""
+    while True:
+        await asyncio.sleep(60)
+        try:
+            await asyncio.to_thread(sessions.evict_idle)
+        except Exception as e:
+            print(f"[Session Error] {e}")
+
+def client_id_from(request, data=None):
+    return shared_client_id(data, request.headers, request.query_params)
+
+async def index(request):
+    return FileResponse(os.path.join(BASE_DIR, "templates", "index.html"))
+
+async def get_metrics(request):
+    """Prometheus scrape target."""
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+async def get_state(request):
+    async with sessions.asession(client_id_from(request)) as soul:
+        return JSONResponse(soul.personality.get_state())
+
+async def chat(request):
+    data = await request.json()
+    user_input = data.get('message')
+
+    if not user_input:
+        return JSONResponse({'error': 'No input provided'}, status_code=400)
+
+    async with sessions.asession(client_id_from(request, data)) as soul:
+        response = await soul.brain.respond_to_user(user_input)
+        return JSONResponse({
+            'response': response,
+            'state': soul.personality.get_state()
+        })
+
+async def chat_stream(request):
+    """Chunked plain-text variant of /api/chat; the body grows as the reply is generated."""
+    data = await request.json()
+    user_input = data.get('message')
+
+    if not user_input:
+        return JSONResponse({'error': 'No input provided'}, status_code=400)
+
+    client_id = client_id_from(request, data)
+
+    async def body():
+        async with sessions.asession(client_id) as soul:
+            async for token in soul.brain.respond_to_user_stream(user_input):
+                yield token
+
+    return StreamingResponse(body(), media_type='text/plain')
+
+@sio.on('connect')
+async def connect_socket(sid, environ):
+    # Like Flask-SocketIO, events fall back to the handshake's header and query string
+    headers = {'X-Soul-Client': environ.get('HTTP_X_SOUL_CLIENT')}
+    params = dict(parse_qsl(environ.get('QUERY_STRING', '')))
+    await sio.save_session(sid, {'client_id': shared_client_id(None, headers, params)})
+
+async def socket_client_id(sid, data):
+    """An event's client_id, else the one its connection identified with."""
+    return (data or {}).get('client_id') or (await sio.get_session(sid)).get('client_id')
+
+@sio.on('join')
+async def join_socket(sid, data):
+    """Puts the connection in its client's room, where that soul's heartbeat messages go."""
+    client_id = await socket_client_id(sid, data)
+    if client_id:
+        await sio.enter_room(sid, client_id)
+
+@sio.on('chat')
+async def chat_socket(sid, data):
+    """Streams the reply back to the sender as soul_token events, then a soul_reply_done."""
+    user_input = (data or {}).get('message')
+    if not user_input:
+        await sio.emit('soul_error', {'error': 'No input provided'}, to=sid)
+        return
+
+    async with sessions.asession(await socket_client_id(sid, data)) as soul:
+        chunks = []
+        async for token in soul.brain.respond_to_user_stream(user_input):
+            chunks.append(token)
+            await sio.emit('soul_token', {'token': token}, to=sid)
+
+        await sio.emit('soul_reply_done', {
+            'response': ''.join(chunks),
+            'state': soul.personality.get_state()
+        }, to=sid)
+
+@asynccontextmanager
+async def lifespan(app):
+    root = sessions.root
+    tasks = [
+        asyncio.create_task(soul_heartbeat()),
+        asyncio.create_task(session_reaper()),
+        # Warm the navigator cache between heartbeats
+        asyncio.create_task(root.brain.prefetcher.run()),
+    ]
+    # Configured MCP servers connect side by side; ones that fail keep retrying in the background
+    await root.brain.mcp.start()
+    try:
+        yield
+    finally:
+        # Graceful shutdown: stop background work, then persist every soul and close clients
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(sessions.close)
+        await root.brain.close()
+        root.memory.close()
+
+http_app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/api/state', get_state, methods=['GET']),
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+        Mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, "static")), name='static'),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])],
+    lifespan=lifespan,
+)
+app = socketio.ASGIApp(sio, other_asgi_app=http_app)
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5000))
+    uvicorn.run(app, host='0.0.0.0', port=port)
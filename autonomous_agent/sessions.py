@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+
+from brain import Brain
+from mcp_manager import MCPManager
+from memory import open_memory
+from navigator import InternetNavigator
+from personality import Personality
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# How many recently active visitors the heartbeat ponders for per tick
+HEARTBEAT_SESSIONS = int(os.getenv("SOUL_HEARTBEAT_SESSIONS", 3))
+
+class Soul:
+    """One visitor's soul: personality, memory and a Brain bound to both."""
+
+    def __init__(self, client_id, personality, memory, brain, state_path=None):
+        self.client_id = client_id
+        self.personality = personality
+        self.memory = memory
+        self.brain = brain
+        self.state_path = state_path
+        self.last_seen = time.monotonic()
+        self.active = 0 # requests currently using this soul; never evicted while > 0
+
+    def save(self):
+        if self.state_path:
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.personality.to_dict(), f)
+            os.replace(tmp_path, self.state_path)
+        self.memory.close()
+
+class SessionPool:
+    """Per-client souls, loaded on first use and evicted (persisted, then dropped) when idle.
+
+    At most `max_sessions` souls stay resident; past that the least recently used idle one
+    goes. Every soul shares the root brain's providers, scheduler, cache and navigator.
+    Requests without a client id get the root soul, which is never evicted.
+    """
+
+    def __init__(self, root, directory=None, max_sessions=None, idle_seconds=None):
+        self.root = root
+        self.directory = directory or os.getenv("SOUL_SESSION_DIR", "sessions")
+        self.max_sessions = max_sessions or int(os.getenv("SOUL_MAX_SESSIONS", 100))
+        self.idle_seconds = idle_seconds or float(os.getenv("SOUL_SESSION_IDLE", 1800))
+        self.backend = os.getenv("SOUL_MEMORY_BACKEND", "json")
+        os.makedirs(self.directory, exist_ok=True)
+        self._sessions = OrderedDict()
+        self._saving = {} # client_id -> Event set once its evicted soul is on disk
+        self._loading = {} # client_id -> Event set once its soul is resident (or failed to load)
+        self._lock = threading.Lock()
+        self.loaded = 0
+        self.evicted = 0
+
+    def _base_path(self, client_id):
+        # Client ids come from the browser, so only well-behaved ones become file names
+        if not _SAFE_ID.match(client_id):
+            client_id = hashlib.sha256(client_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, client_id)
+
+    def _load(self, client_id):
+        base = self._base_path(client_id)
+        if self.backend == "sqlite":
+            memory = open_memory("sqlite", storage_path=base + ".sqlite", migrate_from=base + ".json")
+        else:
+            memory = open_memory("json", storage_path=base + ".json")
+        personality = Personality()
+        state_path = base + ".personality.json"
+        if os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                personality.load_dict(json.load(f))
+        return Soul(client_id, personality, memory, self.root.brain.spawn(personality, memory), state_path)
+
+    def _pin(self, client_id):
+        """Resident, pinned soul for `client_id` plus whatever that pushed over capacity. May block on disk."""
+        while True:
+            with self._lock:
+                pending = self._saving.get(client_id) or self._loading.get(client_id)
+                if pending is None:
+                    soul = self._sessions.get(client_id)
+                    if soul is not None:
+                        return self._claim(soul)
+                    # Ours to load; the file reads happen outside the lock
+                    loading = self._loading[client_id] = threading.Event()
+            if pending is not None:
+                # Just evicted (reload once its files are written) or someone else is loading it
+                pending.wait()
+                continue
+            try:
+                soul = self._load(client_id)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(client_id)
+                loading.set()
+                raise
+            with self._lock:
+                self._loading.pop(client_id)
+                self._sessions[client_id] = soul
+                self.loaded += 1
+                pinned = self._claim(soul)
+            loading.set()
+            return pinned
+
+    def _claim(self, soul):
+        # Caller holds _lock
+        self._sessions.move_to_end(soul.client_id)
+        soul.active += 1
+        return soul, self._over_capacity()
+
+    def _unpin(self, soul):
+        with self._lock:
+            soul.active -= 1
+            soul.last_seen = time.monotonic()
+
+    @contextmanager
+    def session(self, client_id):
+        """The soul for `client_id`, loaded if needed and pinned in memory while the block runs."""
+        if not client_id:
+            yield self.root
+            return
+        soul, evicted = self._pin(client_id)
+        self._persist(evicted)
+        try:
+            yield soul
+        finally:
+            self._unpin(soul)
+
+    @asynccontextmanager
+    async def asession(self, client_id):
+        """session() for event-loop code: loading, evicting and waiting on saves run in worker threads."""
+        if not client_id:
+            yield self.root
+            return
+        soul, evicted = await asyncio.to_thread(self._pin, client_id)
+        if evicted:
+            await asyncio.to_thread(self._persist, evicted)
+        try:
+            yield soul
+        finally:
+            self._unpin(soul)
+
+    def _over_capacity(self):
+        # Caller holds _lock; busy souls are skipped, so the cap can be exceeded briefly
+        evicted = []
+        for client_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if not self._sessions[client_id].active:
+                evicted.append(self._evict(client_id))
+        return evicted
+
+    def _evict(self, client_id):
+        # Caller holds _lock
+        self._saving[client_id] = threading.Event()
+        return self._sessions.pop(client_id)
+
+    def evict_idle(self):
+        """Persists and drops every soul untouched for `idle_seconds`; returns how many went."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            evicted = [
+                self._evict(client_id) for client_id, soul in list(self._sessions.items())
+                if soul.last_seen < cutoff and not soul.active
+            ]
+        self._persist(evicted)
+        return len(evicted)
+
+    def _persist(self, souls):
+        for soul in souls:
+            try:
+                soul.save()
+                self.evicted += 1
+            except Exception as e:
+                print(f"[Session Error] Saving {soul.client_id} failed: {e}")
+            finally:
+                with self._lock:
+                    self._saving.pop(soul.client_id).set()
+
+    def recent(self, limit):
+        """The most recently active resident souls, newest first."""
+        with self._lock:
+            return list(reversed(self._sessions.values()))[:limit]
+
+    def close(self):
+        with self._lock:
+            souls = [self._evict(client_id) for client_id in list(self._sessions)]
+        self._persist(souls)
+
+    def stats(self):
+        return {"resident": len(self._sessions), "loaded": self.loaded, "evicted": self.evicted}
+
+def create_pool():
+    """Builds the root soul (the global memory store) and a pool for per-visitor souls around it."""
+    personality = Personality()
+    memory = open_memory()
+    brain = Brain(personality, memory, InternetNavigator(), MCPManager())
+    return SessionPool(Soul("default", personality, memory, brain))
+
+def client_id_from(data, headers, params):
+    """A request's client id: the JSON body's client_id, then the X-Soul-Client header, then ?client_id=."""
+    return (data or {}).get("client_id") or headers.get("X-Soul-Client") or params.get("client_id")
+
+def heartbeat_delay():
+    # Ponder every 10-15 minutes to strictly stay within free tier quota
+    return os.urandom(1)[0] % 300 + 600
+
+async def beat(soul):
+    """One proactive beat for `soul`: curiosity, or else a silent thought. Returns (event, payload)."""
+    # Check for proactive behavior
+    action_result = await soul.brain.check_curiosity()
+
+    if action_result:
+        # Determine if it's a thought or proactive speech
+        msg_type = "insight" if "[" in action_result else "proactive"
+        return 'soul_message', {
+            'type': msg_type,
+            'content': action_result,
+            'state': soul.personality.get_state()
+        }
+    # Occasional silent thought
+    thought = await soul.brain.generate_thought()
+    return 'soul_thought', {
+        'content': thought,
+        'state': soul.personality.get_state()
+    }
+
+async def heartbeat(pool, limit=None):
+    """One beat for each of the most recently active souls (the root soul if there are none).
+
+    Returns [(room, event, payload)]; the room is the client id, None for the root soul.
+    """
+    # Only the most recent visitors get a beat, so quota use doesn't scale with users
+    client_ids = [soul.client_id for soul in pool.recent(limit or HEARTBEAT_SESSIONS)]
+    async with AsyncExitStack() as pinned:
+        souls = [await pinned.enter_async_context(pool.asession(client_id)) for client_id in client_ids]
+        # Beats run side by side instead of one after another
+        results = await asyncio.gather(*(beat(soul) for soul in souls or [pool.root]), return_exceptions=True)
+    beats = []
+    for room, result in zip(client_ids or [None], results):
+        if isinstance(result, Exception):
+            print(f"[Soul Heartbeat Error] {result}")
+            continue
+        beats.append((room, *result))
+    return beats
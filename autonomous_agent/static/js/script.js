@@ -1,5 +1,13 @@
 const socket = io();
 
+// Each browser keeps its own soul on the server, keyed by this id
+let clientId = localStorage.getItem('soulClientId');
+if (!clientId) {
+  clientId = (crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`);
+  localStorage.setItem('soulClientId', clientId);
+}
+socket.on('connect', () => socket.emit('join', { client_id: clientId }));
+
 // UI Elements
 const chatContainer = document.getElementById('chat-container');
 const userInput = document.getElementById('user-input');
@@ -46,6 +54,9 @@ function appendMessage(role, text) {
   });
 }
 
+// Reply currently being streamed in via soul_token events
+let streamingMessage = null;
+
 async function sendMessage() {
   const text = userInput.value.trim();
   if (!text) return;
@@ -53,11 +64,18 @@ async function sendMessage() {
   userInput.value = '';
   appendMessage('user', text);
 
+  // Prefer the streamed socket path; fall back to the plain JSON endpoint
+  if (socket.connected) {
+    streamingMessage = null;
+    socket.emit('chat', { message: text, client_id: clientId });
+    return;
+  }
+
   try {
     const response = await fetch('/api/chat', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ message: text })
+      body: JSON.stringify({ message: text, client_id: clientId })
     });
     const data = await response.json();
     appendMessage('agent', data.response);
@@ -68,6 +86,21 @@ async function sendMessage() {
 }
 
 // Socket Events
+socket.on('soul_token', (data) => {
+  if (!streamingMessage) {
+    appendMessage('agent', '');
+    streamingMessage = chatContainer.lastChild.querySelector('p');
+  }
+  streamingMessage.textContent += data.token;
+  chatContainer.scrollTop = chatContainer.scrollHeight;
+});
+
+socket.on('soul_reply_done', (data) => {
+  if (!streamingMessage) appendMessage('agent', data.response);
+  streamingMessage = null;
+  updateUI(data.state);
+});
+
 socket.on('soul_message', (data) => {
   const role = data.type === 'proactive' ? 'agent' : 'system';
   appendMessage(role, data.content);
@@ -90,7 +123,7 @@ userInput.addEventListener('keypress', (e) => { if (e.key === 'Enter') sendMessa
 // Initial Load
 (async () => {
   try {
-    const res = await fetch('/api/state');
+    const res = await fetch(`/api/state?client_id=${encodeURIComponent(clientId)}`);
     const state = await res.json();
     updateUI(state);
   } catch (e) { }
@@ -0,0 +1,79 @@
+"""Journal replay after a crash. Run with: python -m pytest test_memory_journal.py"""
+import os
+
+from memory import MemoryManager
+
+def open_manager(tmp_path):
+    return MemoryManager(storage_path=str(tmp_path / "memory.json"), journal=True, flush_interval=0, archive_dir="0")
+
+def crash(memory):
+    # Stop like a killed process would: the journal is on disk, no snapshot is written
+    memory._closing = True
+    memory._wake.set()
+    if memory._journal_file is not None:
+        memory._journal_file.close()
+        memory._journal_file = None
+
+def thoughts(memory):
+    return [entry["thought"] for entry in memory.iter_history("internal_thoughts")]
+
+def test_replay_restores_unsnapshotted_events(tmp_path):
+    memory = open_manager(tmp_path)
+    for i in range(3):
+        memory.add_thought(f"t{i}")
+    crash(memory)
+
+    assert thoughts(open_manager(tmp_path)) == ["t0", "t1", "t2"]
+
+def test_torn_last_line_is_dropped(tmp_path):
+    memory = open_manager(tmp_path)
+    memory.add_thought("t0")
+    memory.add_thought("t1")
+    crash(memory)
+    with open(memory.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "append", "kind": "internal_th')
+
+    memory = open_manager(tmp_path)
+    memory.add_thought("t2")
+    crash(memory)
+
+    assert thoughts(open_manager(tmp_path)) == ["t0", "t1", "t2"]
+
+def test_last_line_without_newline_survives_next_append(tmp_path):
+    memory = open_manager(tmp_path)
+    for i in range(3):
+        memory.add_thought(f"t{i}")
+    crash(memory)
+    with open(memory.journal_path, "r", encoding="utf-8") as f:
+        data = f.read()
+    with open(memory.journal_path, "w", encoding="utf-8") as f:
+        f.write(data.rstrip("\n"))
+
+    memory = open_manager(tmp_path)
+    memory.add_thought("t3")
+    crash(memory)
+
+    assert thoughts(open_manager(tmp_path)) == ["t0", "t1", "t2", "t3"]
+
+def test_events_after_a_snapshot_survive(tmp_path):
+    memory = open_manager(tmp_path)
+    memory.add_thought("t0")
+    memory.save_memory()
+    memory.add_thought("t1")
+    crash(memory)
+
+    assert thoughts(open_manager(tmp_path)) == ["t0", "t1"]
+
+def test_crash_before_rotated_journal_is_trimmed(tmp_path):
+    memory = open_manager(tmp_path)
+    memory.add_thought("t0")
+    memory.add_thought("t1")
+    crash(memory)
+    # As if a snapshot moved the journal aside and died before trimming it
+    os.replace(memory.journal_path, memory.rotated_journal_path)
+
+    memory = open_manager(tmp_path)
+    memory.add_thought("t2")
+    crash(memory)
+
+    assert thoughts(open_manager(tmp_path)) == ["t0", "t1", "t2"]
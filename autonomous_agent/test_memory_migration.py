@@ -0,0 +1,30 @@
+"""JSON -> SQLite migration. Run with: python -m pytest test_memory_migration.py"""
+import os
+
+from memory import MemoryManager
+from memory_sqlite import SQLiteMemoryManager
+
+def source_files(tmp_path):
+    found = {}
+    for root, _, files in os.walk(tmp_path / "json"):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as f:
+                found[os.path.join(root, name)] = f.read()
+    return found
+
+def test_migration_keeps_archived_history_and_leaves_source_alone(tmp_path):
+    os.makedirs(tmp_path / "json")
+    json_path = str(tmp_path / "json" / "memory.json")
+    memory = MemoryManager(storage_path=json_path, journal=True, flush_interval=0, hot_limit=5, summary_chunk=2)
+    for i in range(20):
+        memory.add_thought(f"t{i}")
+    memory.close()
+    assert memory.archive.count("internal_thoughts") > 0
+    before = source_files(tmp_path)
+
+    db = SQLiteMemoryManager(str(tmp_path / "memory.sqlite"), migrate_from=json_path)
+    try:
+        assert [entry["thought"] for entry in db.iter_history("internal_thoughts")] == [f"t{i}" for i in range(20)]
+    finally:
+        db.close()
+    assert source_files(tmp_path) == before
@@ -0,0 +1,72 @@
+"""Falling over to the next provider when the first-ranked one errors. Run with: python -m pytest test_provider_fallback.py"""
+import asyncio
+
+from brain import Brain
+from providers import ProviderRegistry
+from scheduler import RequestScheduler, TokenBucket
+
+class StubProvider:
+    def __init__(self, name, reply=None, error=None):
+        self.name = name
+        self.api_key = "key"
+        self.reply = reply
+        self.error = error
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise Exception(self.error)
+        return self.reply
+
+    async def stream(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise Exception(self.error)
+        yield self.reply
+
+def make_brain(*providers):
+    # Only what the provider loops touch; Brain() itself needs keys, navigator, MCP...
+    brain = Brain.__new__(Brain)
+    brain.providers = ProviderRegistry(providers)
+    # Gemini has tokens, Poe's bucket is empty, so Gemini is ranked first
+    brain.scheduler = RequestScheduler({"gemini": TokenBucket(600, 10), "poe": TokenBucket(600, 1)})
+    brain.scheduler.buckets["poe"].tokens = 0.5
+    brain.user_deadline = brain.bg_deadline = 5
+    brain.hedge_delay = None
+    brain.cache = None
+    return brain
+
+def rate_limited_pair():
+    gemini = StubProvider("gemini", error="Quota exceeded (429). Please wait.")
+    poe = StubProvider("poe", reply="hello from poe")
+    return gemini, poe
+
+def test_429_from_first_ranked_provider_falls_over():
+    gemini, poe = rate_limited_pair()
+    brain = make_brain(poe, gemini)
+    assert [p.name for p in brain._route(False)] == ["gemini", "poe"]
+
+    assert asyncio.run(brain._call_providers("hi", False)) == "hello from poe"
+    assert gemini.calls == 1 and poe.calls == 1
+    assert brain.providers.health["gemini"].consecutive_failures == 1
+    assert brain.providers.health["poe"].consecutive_failures == 0
+
+def test_429_from_first_ranked_provider_falls_over_when_streaming():
+    gemini, poe = rate_limited_pair()
+    brain = make_brain(poe, gemini)
+
+    async def collect():
+        return [token async for token in brain._stream_model_response("hi")]
+
+    assert asyncio.run(collect()) == ["hello from poe"]
+    assert brain.providers.health["gemini"].consecutive_failures == 1
+
+def test_raises_once_every_provider_failed():
+    brain = make_brain(StubProvider("poe", error="boom"), StubProvider("gemini", error="429"))
+    try:
+        asyncio.run(brain._call_providers("hi", False))
+    except Exception as e:
+        assert "All cognitive streams failed" in str(e)
+    else:
+        raise AssertionError("expected the call to fail")